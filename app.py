@@ -1,5 +1,7 @@
+import hashlib
 import logging
 import os
+import uuid
 from datetime import datetime
 from typing import Tuple
 import json
@@ -7,12 +9,19 @@ import json
 
 import streamlit as st
 from backend.ai_service import generate_dialogue
-from backend.shorts_renderer import render_shorts_video
+from backend.fragmented_mp4 import published_state
+from backend.job_queue import TERMINAL_STATUSES, get_job, request_cancel, submit_job
+from backend.media_server import media_enabled, media_url, start_media_server
+from backend.render_worker import output_path_for
+from backend.tracing import mark_cache_miss, span
 from backend.stt_service import transcribe_audio
-from backend.tts_service import mp3_duration_seconds, speak_text, stitch_mp3_chunks, voice_id_for
+from backend.tts_service import mp3_duration_seconds, speak_lines, stitch_mp3_chunks, voice_id_for
 
 
 
+# One logger and one open log file for the whole app process; sessions share
+# it, so nothing accumulates as browser sessions come and go.
+@st.cache_resource
 def _setup_logger(base_dir: str) -> Tuple[logging.Logger, str]:
     os.makedirs(base_dir, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -22,6 +31,7 @@ def _setup_logger(base_dir: str) -> Tuple[logging.Logger, str]:
     logger.setLevel(logging.INFO)
     for handler in list(logger.handlers):
         logger.removeHandler(handler)
+        handler.close()
 
     file_handler = logging.FileHandler(log_path, mode="w", encoding="utf-8")
     formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s - %(message)s")
@@ -32,12 +42,121 @@ def _setup_logger(base_dir: str) -> Tuple[logging.Logger, str]:
     return logger, log_path
 
 
+# Each pipeline stage is cached on its inputs so Streamlit reruns (button clicks,
+# selectbox changes) reuse earlier results instead of redoing STT, LLM and TTS.
+# Logger arguments are underscore-prefixed so st.cache_data skips hashing them.
+# Callers wrap each call in a span with cache_hit=True; the body only runs on
+# a miss, and mark_cache_miss() flips the flag.
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_transcription(audio_digest: str, _audio_path: str, _logger: logging.Logger) -> str:
+    mark_cache_miss()
+    return transcribe_audio(_audio_path, logger=_logger)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_dialogue(topic: str, _logger: logging.Logger) -> list[dict[str, str]]:
+    mark_cache_miss()
+    return generate_dialogue(topic, logger=_logger)
+
+
+# All lines go to the engine in one batch so engines with a worker pool (Coqui)
+# synthesize them in parallel.
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_lines_audio(lines: tuple[tuple[str, str], ...], _logger: logging.Logger) -> list[tuple[bytes, float]]:
+    mark_cache_miss()
+    return [(chunk, mp3_duration_seconds(chunk)) for chunk in speak_lines(lines, logger=_logger)]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_stitch(chunks: tuple[bytes, ...], pause_ms: int, _logger: logging.Logger) -> bytes:
+    mark_cache_miss()
+    return stitch_mp3_chunks(list(chunks), pause_ms=pause_ms, logger=_logger)
+
+
+def _write_content_addressed(directory: str, prefix: str, ext: str, data: bytes) -> Tuple[str, str]:
+    """Write ``data`` to ``<directory>/<prefix>_<sha256>.<ext>`` unless it is already there.
+
+    Sessions share the process, so paths are keyed by content: a rerun skips
+    the write, and another session can never overwrite this one's file.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(directory, f"{prefix}_{digest}.{ext}")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path, digest
+
+
+def _render_job_panel(job_id: str) -> None:
+    job = get_job(job_id)
+    if job is None or job["status"] in TERMINAL_STATUSES:
+        st.rerun()
+    if job["status"] == "queued":
+        st.info("Render queued; waiting for a worker (`python -m backend.render_worker`).")
+    else:
+        stage = job["stage"] or "starting"
+        st.progress(job["progress"], text=f"Rendering Shorts video: {stage} ({job['progress']:.0%})")
+    if st.button("Cancel render", key=f"cancel_{job_id}"):
+        request_cancel(job_id)
+        st.rerun()
+    _show_render_preview(job)
+
+
+def _show_render_preview(job: dict) -> None:
+    # Fragmented renders publish every finished fragment. The player gets a
+    # fixed snapshot so the 2s panel refresh does not restart playback.
+    output_path = output_path_for(job)
+    state = published_state(output_path)
+    if not state or not state["fragments"]:
+        return
+    state_key = f"render_preview_{job['id']}"
+    shown = st.session_state.setdefault(state_key, state)
+    preview_url = media_url(output_path, upto=shown["bytes"])
+    if preview_url is None:
+        return
+    st.video(preview_url)
+    st.caption(f"Preview of the first ~{shown['seconds']:.0f}s; the rest is still encoding.")
+    if state["bytes"] > shown["bytes"] and st.button("Refresh preview", key=f"refresh_{job['id']}"):
+        st.session_state[state_key] = state
+        st.rerun(scope="fragment")
+
+
+def _show_finished_job(job: dict) -> None:
+    if job["status"] == "cancelled":
+        st.info("Render cancelled.")
+        return
+    if job["status"] == "failed":
+        st.error(f"Render failed: {job['error']}")
+        return
+    output_path = job["result"]["output_path"]
+    if not os.path.exists(output_path):
+        st.warning(f"Rendered video {output_path} is no longer on disk.")
+        return
+    video_url = media_url(output_path)
+    if video_url is not None:
+        # Served from disk in chunks instead of being loaded into the session.
+        st.video(video_url)
+        st.link_button("Download Shorts Video", media_url(output_path, download="output_short.mp4"))
+        return
+    st.video(output_path)
+    with open(output_path, "rb") as f:
+        st.download_button(
+            "Download Shorts Video",
+            data=f,
+            file_name="output_short.mp4",
+            mime="video/mp4",
+        )
+
+
 st.title("⚡ ShortForm Studio")
 
 temp_dir = "logs"
 temp_media_dir = "temp"
 brainrot_dir = os.path.join(temp_media_dir, "brainRotVideos")
-audio_path = os.path.join(temp_dir, "recorded_audio.wav")
+render_dir = os.path.join(temp_media_dir, "renders")
+start_media_server(render_dir)
 pause_between_lines_ms = 250
 logger, log_path = _setup_logger(temp_dir)
 os.makedirs(temp_media_dir, exist_ok=True)
@@ -53,19 +172,21 @@ if audio:
     logger.info("Audio clip received from user.")
 
     os.makedirs(temp_dir, exist_ok=True)
-    with open(audio_path, "wb") as f:
-        f.write(audio.getbuffer())
+    audio_bytes = audio.getvalue()
+    audio_path, audio_digest = _write_content_addressed(temp_dir, "recorded", "wav", audio_bytes)
     logger.info("Audio saved to %s", audio_path)
 
-    with st.status("Running Duo Mode...", expanded=True) as status:
+    with span("duo_mode", audio_digest=audio_digest[:12]), st.status("Running Duo Mode...", expanded=True) as status:
         status.write("Transcribing your topic...")
-        topic = transcribe_audio(audio_path, logger=logger)
+        with span("stage.transcribe", cache_hit=True, bytes_in=len(audio_bytes)):
+            topic = _cached_transcription(audio_digest, audio_path, logger)
         # topic = "decision trees and how they generate branches"
         st.write(f"Detected topic: **{topic}**")
         logger.info("Detected topic: %s", topic)
 
         status.update(label="Generating dialogue script...", state="running")
-        dialogue = generate_dialogue(topic, logger=logger)
+        with span("stage.dialogue", cache_hit=True):
+            dialogue = _cached_dialogue(topic, logger)
         status.write("Dialogue ready. Preview it below before synthesis.")
 
         st.subheader("Dialogue Script")
@@ -77,13 +198,13 @@ if audio:
         timed_dialogue: list[dict[str, object]] = []
         current_start = 0.0
         pause_seconds = max(pause_between_lines_ms, 0) / 1000.0
-        for idx, turn in enumerate(dialogue, start=1):
-            speaker_voice = voice_id_for(turn["speaker"])
-            status.write(f"Generating line {idx} for {turn['speaker']}...")
-            logger.info("Generating line %s for %s", idx, turn["speaker"])
-            chunk = speak_text(turn["line"], voice_id=speaker_voice, logger=logger)
+        lines = tuple((turn["line"], voice_id_for(turn["speaker"])) for turn in dialogue)
+        status.write(f"Generating {len(lines)} lines...")
+        logger.info("Generating %s lines", len(lines))
+        with span("stage.tts", cache_hit=True, lines=len(lines)):
+            line_audio = _cached_lines_audio(lines, logger)
+        for turn, (chunk, duration) in zip(dialogue, line_audio):
             audio_chunks.append(chunk)
-            duration = mp3_duration_seconds(chunk)
             timed_dialogue.append(
                 {
                     "speaker": turn["speaker"],
@@ -100,18 +221,14 @@ if audio:
             )
             current_start += duration + pause_seconds
 
-        final_audio = stitch_mp3_chunks(
-            audio_chunks,
-            pause_ms=pause_between_lines_ms,
-            logger=logger,
-        )
-        duo_audio_path = os.path.join(temp_media_dir, "duo_audio.mp3")
-        with open(duo_audio_path, "wb") as f:
-            f.write(final_audio)
+        with span("stage.stitch", cache_hit=True):
+            final_audio = _cached_stitch(tuple(audio_chunks), pause_between_lines_ms, logger)
+        duo_audio_path, duo_audio_digest = _write_content_addressed(temp_media_dir, "duo_audio", "mp3", final_audio)
         status.update(label="Duo Mode complete!", state="complete")
         logger.info("Dialogue audio stitched successfully.")
         st.session_state["timed_dialogue"] = timed_dialogue
         st.session_state["duo_audio_path"] = duo_audio_path
+        st.session_state["duo_audio_digest"] = duo_audio_digest
 
         # st.write(timed_dialogue)
         # st.write(duo_audio_path)
@@ -175,22 +292,32 @@ if audio:
         elif not selected_brainrot:
             st.error("Please add a background video to temp/brainRotVideos/ first.")
         else:
-            with st.status("Rendering Shorts video...", expanded=True) as status:
-                output_path = os.path.join(temp_media_dir, "output_short.mp4")
-                status.write("Compositing video and captions...")
-                bg_video_path = os.path.join(brainrot_dir, selected_brainrot)
-                render_shorts_video(
-                    st.session_state["timed_dialogue"],
-                    audio_path=st.session_state["duo_audio_path"],
-                    output_path=output_path,
-                    bg_video_path=bg_video_path,
-                )
-                status.update(label="Shorts video ready!", state="complete")
-            st.video(output_path)
-            with open(output_path, "rb") as f:
-                st.download_button(
-                    "Download Shorts Video",
-                    data=f,
-                    file_name="output_short.mp4",
-                    mime="video/mp4",
-                )
+            # Snapshot the stitched audio so a later Duo Mode run cannot
+            # overwrite it while the job is still queued.
+            os.makedirs(render_dir, exist_ok=True)
+            with open(st.session_state["duo_audio_path"], "rb") as f:
+                job_audio_path, _ = _write_content_addressed(render_dir, "audio", "mp3", f.read())
+            job_id = submit_job(
+                {
+                    "timed_dialogue": st.session_state["timed_dialogue"],
+                    "duo_audio_path": job_audio_path,
+                    "bg_video_path": os.path.join(brainrot_dir, selected_brainrot),
+                    # Fragmented output only pays off when the media server can
+                    # stream the partial file as a preview.
+                    "fragmented": media_enabled(),
+                }
+            )
+            logger.info("Submitted render job %s", job_id)
+            st.session_state["render_job_id"] = job_id
+            st.query_params["job"] = job_id
+
+# The render job id lives in the URL too, so a page reload picks the job back up.
+render_job_id = st.session_state.get("render_job_id") or st.query_params.get("job")
+if render_job_id:
+    render_job = get_job(render_job_id)
+    if render_job is None:
+        st.warning(f"Render job {render_job_id} not found.")
+    elif render_job["status"] in ("queued", "running"):
+        st.fragment(run_every=2)(_render_job_panel)(render_job_id)
+    else:
+        _show_finished_job(render_job)
@@ -1,12 +1,21 @@
 """AI service powered by OpenAI GPT models."""
+import asyncio
+from collections import deque
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import json
 import logging
 import os
+import threading
+import time
 from typing import Dict, List, Optional
 import streamlit as st
 
 from dotenv import load_dotenv
-from openai import OpenAI, OpenAIError
+from openai import AsyncOpenAI, OpenAI, OpenAIError
+
+from backend.api_clients import LoopLocal, build_async_http_client, build_http_client, policy_for
+from backend.tracing import register_counters, span
 
 load_dotenv()
 
@@ -15,9 +24,41 @@ if not _OPENAI_API_KEY:
     raise RuntimeError("Missing OPENAI_API_KEY in environment/.env file.")
 
 _MODEL_NAME = os.getenv("OPENAI_MODEL", "gpt-5-mini-2025-08-07")
-_client = OpenAI(api_key=_OPENAI_API_KEY)
+# Retries are handled by the shared policy, so the SDK's own retries are off.
+# OPENAI_BASE_URL is honoured by the SDK for pointing at a local stand-in.
+_client = OpenAI(api_key=_OPENAI_API_KEY, http_client=build_http_client("OPENAI"), max_retries=0)
+_async_client = LoopLocal(
+    lambda: AsyncOpenAI(api_key=_OPENAI_API_KEY, http_client=build_async_http_client("OPENAI"), max_retries=0)
+)
+_policy = policy_for("OPENAI")
 _logger = logging.getLogger(__name__)
 
+# Hedging: if the first dialogue request is still running after the hedge delay,
+# fire an identical second request and keep whichever valid reply lands first.
+_HEDGE_ENABLED = os.getenv("OPENAI_HEDGE_ENABLED", "0") == "1"
+_HEDGE_DELAY_SEC = float(os.getenv("OPENAI_HEDGE_DELAY_SEC", "0") or 0)  # 0 = adaptive p90
+_HEDGE_DEFAULT_DELAY_SEC = 20.0
+_HEDGE_MIN_SAMPLES = 5
+_HEDGE_MAX_PER_MINUTE = int(os.getenv("OPENAI_HEDGE_MAX_PER_MINUTE", "4"))
+# Every hedged sync call holds a slot per request (abandoned losers until their
+# HTTP call returns), so size this above the caller's own concurrency.
+_HEDGE_WORKERS = int(os.getenv("OPENAI_HEDGE_WORKERS", "32"))
+
+_hedge_lock = threading.Lock()
+_hedge_executor = ThreadPoolExecutor(max_workers=_HEDGE_WORKERS, thread_name_prefix="openai-hedge")
+_recent_latencies: deque[float] = deque(maxlen=50)
+_recent_hedges: deque[float] = deque()
+_hedge_stats: Dict[str, int] = {
+    "requests": 0,
+    "hedges_launched": 0,
+    "hedges_skipped": 0,
+    "primary_wins": 0,
+    "hedge_wins": 0,
+    "losers_cancelled": 0,
+    "losers_abandoned": 0,
+    "executor_saturated": 0,
+}
+
 
 def _chat_completion(
     messages: List[Dict[str, str]],
@@ -26,17 +67,59 @@ def _chat_completion(
     logger: Optional[logging.Logger] = None,
 ) -> str:
     active_logger = logger or _logger
-    try:
-        response = _client.chat.completions.create(
-            model=_MODEL_NAME,
-            messages=messages,
-            max_completion_tokens=max_tokens,
-            response_format=response_format,
-        )
-        # st.write(response)
-    except OpenAIError as exc:  # pragma: no cover - depends on API availability
-        raise RuntimeError(f"OpenAI API call failed: {exc}") from exc
+    bytes_in = sum(len(message["content"]) for message in messages)
+    with span("llm.chat_completion", model=_MODEL_NAME, bytes_in=bytes_in) as s:
+        try:
+            response = _policy.call(
+                lambda: _client.chat.completions.create(
+                    model=_MODEL_NAME,
+                    messages=messages,
+                    max_completion_tokens=max_tokens,
+                    response_format=response_format,
+                )
+            )
+            # st.write(response)
+        except OpenAIError as exc:  # pragma: no cover - depends on API availability
+            raise RuntimeError(f"OpenAI API call failed: {exc}") from exc
+
+        content = _response_content(response, messages, response_format, active_logger)
+        s.set(bytes_out=len(content))
+    return content
+
+
+async def _chat_completion_async(
+    messages: List[Dict[str, str]],
+    max_tokens: int = 500,
+    response_format: Dict[str, str] | None = None,
+    logger: Optional[logging.Logger] = None,
+) -> str:
+    active_logger = logger or _logger
+    bytes_in = sum(len(message["content"]) for message in messages)
+    with span("llm.chat_completion", model=_MODEL_NAME, bytes_in=bytes_in) as s:
+        try:
+            client = _async_client.get()
+            response = await _policy.acall(
+                lambda: client.chat.completions.create(
+                    model=_MODEL_NAME,
+                    messages=messages,
+                    max_completion_tokens=max_tokens,
+                    response_format=response_format,
+                )
+            )
+        except OpenAIError as exc:  # pragma: no cover - depends on API availability
+            raise RuntimeError(f"OpenAI API call failed: {exc}") from exc
+
+        content = _response_content(response, messages, response_format, active_logger)
+        s.set(bytes_out=len(content))
+    return content
+
 
+def _response_content(
+    response,
+    messages: List[Dict[str, str]],
+    response_format: Dict[str, str] | None,
+    active_logger: logging.Logger,
+) -> str:
     active_logger.debug(
         "OpenAI response received (model=%s, format=%s, messages=%d): %s",
         _MODEL_NAME,
@@ -55,6 +138,125 @@ def _chat_completion(
     return content.strip()
 
 
+def _timed_completion(
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    response_format: Dict[str, str] | None,
+    logger: logging.Logger,
+) -> str:
+    started = time.monotonic()
+    content = _chat_completion(
+        messages,
+        max_tokens=max_tokens,
+        response_format=response_format,
+        logger=logger,
+    )
+    with _hedge_lock:
+        _recent_latencies.append(time.monotonic() - started)
+    return content
+
+
+def _hedge_delay() -> float:
+    if _HEDGE_DELAY_SEC > 0:
+        return _HEDGE_DELAY_SEC
+    with _hedge_lock:
+        samples = sorted(_recent_latencies)
+    if len(samples) < _HEDGE_MIN_SAMPLES:
+        return _HEDGE_DEFAULT_DELAY_SEC
+    return samples[min(len(samples) - 1, int(len(samples) * 0.9))]
+
+
+def _reserve_hedge() -> bool:
+    """Take a slot from the per-minute hedge budget; False when it is spent."""
+    now = time.monotonic()
+    with _hedge_lock:
+        while _recent_hedges and now - _recent_hedges[0] > 60.0:
+            _recent_hedges.popleft()
+        if len(_recent_hedges) >= _HEDGE_MAX_PER_MINUTE:
+            _hedge_stats["hedges_skipped"] += 1
+            return False
+        _recent_hedges.append(now)
+        _hedge_stats["hedges_launched"] += 1
+        return True
+
+
+def hedge_stats() -> Dict[str, int]:
+    """Return a snapshot of the hedging counters (launched, wins, skips)."""
+    with _hedge_lock:
+        return dict(_hedge_stats)
+
+
+register_counters("openai_hedge", hedge_stats)
+
+
+def _hedged_dialogue_completion(
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    response_format: Dict[str, str] | None,
+    logger: logging.Logger,
+) -> List[Dict[str, str]]:
+    """Run a dialogue request, hedging with a duplicate once the delay passes.
+
+    The first reply that passes ``_parse_dialogue_payload`` wins. The losing
+    request is cancelled if it has not started yet; an in-flight blocking HTTP
+    call cannot be interrupted, so its reply is simply discarded (counted as
+    abandoned).
+    """
+    with _hedge_lock:
+        _hedge_stats["requests"] += 1
+
+    def _submit(started: Optional[threading.Event] = None) -> Future:
+        def _run() -> str:
+            if started is not None:
+                started.set()
+            return _timed_completion(messages, max_tokens, response_format, logger)
+
+        # Run in a copy of the caller's context so its span becomes the parent.
+        return _hedge_executor.submit(contextvars.copy_context().run, _run)
+
+    primary_started = threading.Event()
+    primary = _submit(primary_started)
+    pending: Dict[Future, str] = {primary: "primary"}
+    # The hedge delay counts from when the primary actually starts, so time
+    # queued behind other callers does not trigger needless hedges. If it has
+    # not started within one delay the executor is saturated (e.g. by
+    # abandoned losers), so run the request unhedged on this thread instead.
+    if not primary_started.wait(timeout=_hedge_delay()) and primary.cancel():
+        logger.warning("Hedge executor saturated; running dialogue request unhedged.")
+        with _hedge_lock:
+            _hedge_stats["executor_saturated"] += 1
+        return _parse_dialogue_payload(_timed_completion(messages, max_tokens, response_format, logger))
+    done, _ = wait([primary], timeout=_hedge_delay())
+    hedged = False
+    if not done and _reserve_hedge():
+        logger.info("Primary dialogue request slow; launching hedge request.")
+        pending[_submit()] = "hedge"
+        hedged = True
+
+    last_error: Exception | None = None
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            label = pending.pop(future)
+            try:
+                parsed = _parse_dialogue_payload(future.result())
+            except (ValueError, RuntimeError) as exc:
+                logger.warning("Dialogue %s request failed: %s", label, exc)
+                last_error = exc
+                continue
+            cancelled = sum(1 for loser in pending if loser.cancel())
+            with _hedge_lock:
+                _hedge_stats[f"{label}_wins"] += 1
+                _hedge_stats["losers_cancelled"] += cancelled
+                _hedge_stats["losers_abandoned"] += len(pending) - cancelled
+            if hedged:
+                logger.info("Dialogue %s request won the hedge race.", label)
+            return parsed
+
+    assert last_error is not None
+    raise last_error
+
+
 def generate_topic_explanation(topic: str) -> str:
     prompt = (
         f"Explain the topic '{topic}' in under 120 words using approachable language. "
@@ -152,6 +354,22 @@ def _parse_dialogue_payload(payload: str) -> List[Dict[str, str]]:
     return parsed
 
 
+def _dialogue_attempt_messages(base_messages: List[Dict[str, str]], attempt: int) -> List[Dict[str, str]]:
+    messages = list(base_messages)
+    if attempt == 1:
+        messages.append(
+            {
+                "role": "system",
+                "content": (
+                    "Reminder: The reply MUST be valid JSON matching "
+                    '{"dialogue":[{"speaker":"CARTOON_DAD","line":"..."},{"speaker":"JOHN","line":"..."},{"speaker":"CARTOON_DAD","line":"..."}]}. '
+                    "Do not add commentary."
+                ),
+            }
+        )
+    return messages
+
+
 def generate_dialogue(topic: str, logger: Optional[logging.Logger] = None) -> List[Dict[str, str]]:
     """Generate a structured three-turn dialogue for Duo Mode."""
     active_logger = logger or _logger
@@ -161,26 +379,129 @@ def generate_dialogue(topic: str, logger: Optional[logging.Logger] = None) -> Li
     last_error: ValueError | None = None
 
     for attempt in range(2):
-        messages = list(base_messages)
-        if attempt == 1:
-            messages.append(
-                {
-                    "role": "system",
-                    "content": (
-                        "Reminder: The reply MUST be valid JSON matching "
-                        '{"dialogue":[{"speaker":"CARTOON_DAD","line":"..."},{"speaker":"JOHN","line":"..."},{"speaker":"CARTOON_DAD","line":"..."}]}. '
-                        "Do not add commentary."
-                    ),
-                }
-            )
-        raw = _chat_completion(
-            messages,
-            max_tokens=10000,
-            response_format=response_format,
-            logger=active_logger,
+        messages = _dialogue_attempt_messages(base_messages, attempt)
+        try:
+            if _HEDGE_ENABLED:
+                parsed = _hedged_dialogue_completion(
+                    messages,
+                    max_tokens=10000,
+                    response_format=response_format,
+                    logger=active_logger,
+                )
+            else:
+                raw = _chat_completion(
+                    messages,
+                    max_tokens=10000,
+                    response_format=response_format,
+                    logger=active_logger,
+                )
+                parsed = _parse_dialogue_payload(raw)
+            active_logger.info("Dialogue generation succeeded on attempt %s", attempt + 1)
+            return parsed
+        except ValueError as exc:
+            active_logger.warning("Dialogue parse attempt %s failed: %s", attempt + 1, exc)
+            last_error = exc
+            continue
+
+    raise RuntimeError(f"Failed to produce valid dialogue: {last_error}")
+
+
+async def _timed_completion_async(
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    response_format: Dict[str, str] | None,
+    logger: logging.Logger,
+) -> str:
+    started = time.monotonic()
+    content = await _chat_completion_async(
+        messages,
+        max_tokens=max_tokens,
+        response_format=response_format,
+        logger=logger,
+    )
+    with _hedge_lock:
+        _recent_latencies.append(time.monotonic() - started)
+    return content
+
+
+async def _hedged_dialogue_completion_async(
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    response_format: Dict[str, str] | None,
+    logger: logging.Logger,
+) -> List[Dict[str, str]]:
+    """Async twin of ``_hedged_dialogue_completion``; the loser task is cancelled outright."""
+    with _hedge_lock:
+        _hedge_stats["requests"] += 1
+
+    def _submit() -> asyncio.Task:
+        return asyncio.create_task(
+            _timed_completion_async(messages, max_tokens, response_format, logger)
         )
+
+    primary = _submit()
+    pending: Dict[asyncio.Task, str] = {primary: "primary"}
+    hedged = False
+    last_error: Exception | None = None
+    # Everything after the primary starts sits inside the try, so a caller
+    # cancelled during the hedge delay also cancels the in-flight requests.
+    try:
+        done, _ = await asyncio.wait([primary], timeout=_hedge_delay())
+        if not done and _reserve_hedge():
+            logger.info("Primary dialogue request slow; launching hedge request.")
+            pending[_submit()] = "hedge"
+            hedged = True
+
+        while pending:
+            done, _ = await asyncio.wait(list(pending), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                label = pending.pop(task)
+                try:
+                    parsed = _parse_dialogue_payload(task.result())
+                except (ValueError, RuntimeError) as exc:
+                    logger.warning("Dialogue %s request failed: %s", label, exc)
+                    last_error = exc
+                    continue
+                with _hedge_lock:
+                    _hedge_stats[f"{label}_wins"] += 1
+                    _hedge_stats["losers_cancelled"] += len(pending)
+                if hedged:
+                    logger.info("Dialogue %s request won the hedge race.", label)
+                return parsed
+    finally:
+        for loser in pending:
+            loser.cancel()
+
+    assert last_error is not None
+    raise last_error
+
+
+async def generate_dialogue_async(topic: str, logger: Optional[logging.Logger] = None) -> List[Dict[str, str]]:
+    """Async counterpart of ``generate_dialogue`` using the AsyncOpenAI client."""
+    active_logger = logger or _logger
+    active_logger.info("Generating dialogue for topic: %s", topic)
+    base_messages = _dialogue_messages(topic)
+    response_format = {"type": "json_object"}
+    last_error: ValueError | None = None
+
+    for attempt in range(2):
+        messages = _dialogue_attempt_messages(base_messages, attempt)
         try:
-            parsed = _parse_dialogue_payload(raw)
+            if _HEDGE_ENABLED:
+                parsed = await _hedged_dialogue_completion_async(
+                    messages,
+                    max_tokens=10000,
+                    response_format=response_format,
+                    logger=active_logger,
+                )
+            else:
+                raw = await _chat_completion_async(
+                    messages,
+                    max_tokens=10000,
+                    response_format=response_format,
+                    logger=active_logger,
+                )
+                parsed = _parse_dialogue_payload(raw)
             active_logger.info("Dialogue generation succeeded on attempt %s", attempt + 1)
             return parsed
         except ValueError as exc:
@@ -0,0 +1,373 @@
+"""Shared HTTP plumbing for the OpenAI and ElevenLabs clients.
+
+Every outbound API call goes through a per-provider ``ProviderPolicy``:
+
+- a token bucket caps the request rate,
+- an AIMD limiter caps in-flight calls, halving on overload (429, 503,
+  timeouts) and creeping back up by one slot per window of successes,
+- retryable failures (429, 5xx, timeouts, dropped connections) are retried
+  with full-jitter exponential backoff, honouring ``Retry-After``.
+
+The httpx clients handed to the SDKs share tuned connection pools with
+keep-alive. Set ``OPENAI_BASE_URL`` / ``ELEVENLABS_BASE_URL`` to point them
+at a local stand-in server (see ``backend/api_stub_server.py``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from functools import lru_cache
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Deque, Dict, Generic, Optional, Tuple, TypeVar
+import weakref
+
+import httpx
+
+_logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_OVERLOAD_STATUS = {429, 503}
+# Reasoning models can legitimately take minutes on long dialogue requests, so
+# OpenAI keeps the SDK's own 600s default rather than the generic 120s.
+_DEFAULT_TIMEOUT_SEC = {"OPENAI": 600.0}
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _http_limits(prefix: str) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(_env_float(f"{prefix}_MAX_CONNECTIONS", 64)),
+        max_keepalive_connections=int(_env_float(f"{prefix}_MAX_KEEPALIVE", 32)),
+        keepalive_expiry=_env_float(f"{prefix}_KEEPALIVE_SEC", 60.0),
+    )
+
+
+def _http_timeout(prefix: str) -> httpx.Timeout:
+    default = _DEFAULT_TIMEOUT_SEC.get(prefix, 120.0)
+    return httpx.Timeout(_env_float(f"{prefix}_TIMEOUT_SEC", default), connect=10.0)
+
+
+def build_http_client(prefix: str) -> httpx.Client:
+    """Pooled keep-alive httpx client for a provider (env prefix e.g. ``OPENAI``)."""
+    return httpx.Client(limits=_http_limits(prefix), timeout=_http_timeout(prefix))
+
+
+def build_async_http_client(prefix: str) -> httpx.AsyncClient:
+    """Async twin of ``build_http_client``."""
+    return httpx.AsyncClient(limits=_http_limits(prefix), timeout=_http_timeout(prefix))
+
+
+class LoopLocal(Generic[T]):
+    """One ``factory()`` result per running event loop.
+
+    httpx async clients bind their connections to the loop that first used
+    them, so a module-level client breaks on the second ``asyncio.run``
+    ("Event loop is closed"). Entries go away with their loop.
+    """
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._values: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._values.get(loop)
+            if value is None:
+                value = self._values[loop] = self._factory()
+        return value
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``rate`` tokens per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit: additive increase, multiplicative decrease.
+
+    Async callers queue a future per call and are granted slots in arrival
+    order by ``release`` (across loops, via ``call_soon_threadsafe``).
+    """
+
+    def __init__(self, initial: float, minimum: float = 1.0, maximum: float = 64.0, backoff: float = 0.5) -> None:
+        self.minimum = max(minimum, 1.0)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.backoff = backoff
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = deque()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if not self._async_waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if not self._async_waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter: "asyncio.Future[None]" = loop.create_future()
+            self._async_waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._cond:
+                if (loop, waiter) in self._async_waiters:
+                    self._async_waiters.remove((loop, waiter))
+                    raise
+            # The slot was already granted; a cancelled waiter is handed back
+            # by ``_grant``, a completed one has to be returned here.
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+
+    def _grant(self, waiter: "asyncio.Future[None]") -> None:
+        if waiter.done():
+            self._release_slot()
+        else:
+            waiter.set_result(None)
+
+    def _wake_async_waiters(self) -> None:
+        # Caller holds self._cond.
+        while self._async_waiters and self.in_flight < int(self.limit):
+            loop, waiter = self._async_waiters.popleft()
+            self.in_flight += 1
+            try:
+                loop.call_soon_threadsafe(self._grant, waiter)
+            except RuntimeError:  # loop already closed; nobody is waiting any more
+                self.in_flight -= 1
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._wake_async_waiters()
+            self._cond.notify_all()
+
+    def release(self, outcome: str = "success") -> None:
+        """Free a slot; ``outcome`` is "success", "overloaded" or "error".
+
+        Only successes grow the limit and only overload shrinks it; other
+        errors (bad requests, non-overload 5xx) leave it unchanged.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "overloaded":
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            elif outcome == "success":
+                self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+            self._wake_async_waiters()
+            self._cond.notify_all()
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or getattr(exc, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, httpx.TimeoutException) or type(exc).__name__ == "APITimeoutError"
+
+
+def _is_overload(exc: BaseException) -> bool:
+    return _status_code(exc) in _OVERLOAD_STATUS or _is_timeout(exc)
+
+
+def _is_transport_error(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    # openai wraps httpx errors in APIConnectionError/APITimeoutError.
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class ProviderPolicy:
+    """Rate limit, adaptive concurrency and retry policy for one API provider."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate_per_sec: float,
+        burst: float,
+        initial_concurrency: float,
+        max_concurrency: float,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+    ) -> None:
+        self.name = name
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.limiter = AIMDLimiter(initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats: Dict[str, int] = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _should_retry(self, exc: BaseException, attempt: int, idempotent: bool) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        status = _status_code(exc)
+        if status == 429:
+            # The provider rejected the call outright, so retrying is always safe.
+            return True
+        if not idempotent:
+            return False
+        return (status is not None and status in _RETRYABLE_STATUS) or _is_transport_error(exc)
+
+    def _backoff(self, exc: BaseException, attempt: int) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def call(self, fn: Callable[[], T], *, idempotent: bool = True) -> T:
+        """Run ``fn`` under the policy, retrying transient failures."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self.limiter.acquire()
+            outcome = "error"
+            try:
+                result = fn()
+                outcome = "success"
+                return result
+            except Exception as exc:
+                if _is_overload(exc):
+                    outcome = "overloaded"
+                    self._count("throttled")
+                if not self._should_retry(exc, attempt, idempotent):
+                    self._count("failures")
+                    raise
+                delay = self._backoff(exc, attempt)
+                _logger.warning(
+                    "%s call failed (%s); retry %s/%s in %.2fs",
+                    self.name, exc, attempt + 1, self.max_retries, delay,
+                )
+            finally:
+                self.limiter.release(outcome)
+            self._count("retries")
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], *, idempotent: bool = True) -> T:
+        """Async version of ``call``; ``fn`` returns a fresh awaitable per attempt."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            await self.bucket.acquire_async()
+            await self.limiter.acquire_async()
+            outcome = "error"
+            try:
+                result = await fn()
+                outcome = "success"
+                return result
+            except Exception as exc:
+                if _is_overload(exc):
+                    outcome = "overloaded"
+                    self._count("throttled")
+                if not self._should_retry(exc, attempt, idempotent):
+                    self._count("failures")
+                    raise
+                delay = self._backoff(exc, attempt)
+                _logger.warning(
+                    "%s call failed (%s); retry %s/%s in %.2fs",
+                    self.name, exc, attempt + 1, self.max_retries, delay,
+                )
+            finally:
+                self.limiter.release(outcome)
+            self._count("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["concurrency_limit"] = round(self.limiter.limit, 2)
+        stats["in_flight"] = self.limiter.in_flight
+        return stats
+
+
+@lru_cache(maxsize=None)
+def policy_for(prefix: str) -> ProviderPolicy:
+    """Process-wide policy for a provider, tuned by ``<PREFIX>_*`` env vars."""
+    return ProviderPolicy(
+        prefix.lower(),
+        rate_per_sec=_env_float(f"{prefix}_RATE_PER_SEC", 0),  # 0 = unlimited
+        burst=_env_float(f"{prefix}_BURST", 10),
+        initial_concurrency=_env_float(f"{prefix}_CONCURRENCY", 8),
+        max_concurrency=_env_float(f"{prefix}_MAX_CONCURRENCY", 64),
+        max_retries=int(_env_float(f"{prefix}_MAX_RETRIES", 4)),
+        base_delay=_env_float(f"{prefix}_RETRY_BASE_SEC", 0.5),
+        max_delay=_env_float(f"{prefix}_RETRY_MAX_SEC", 20.0),
+    )
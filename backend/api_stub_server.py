@@ -0,0 +1,214 @@
+"""Local stand-in for the OpenAI and ElevenLabs endpoints the backend uses.
+
+Serves ``POST /v1/chat/completions`` and ``POST /v1/text-to-speech/<voice_id>``
+with injected latency and errors, so the retry/rate-limit layer in
+``backend/api_clients.py`` can be exercised offline::
+
+    python -m backend.api_stub_server --port 8765 --latency lognormal:400:0.5 --error-rate 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 ELEVENLABS_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+
+Latency specs are ``fixed:MS``, ``uniform:LO:HI``, ``normal:MEAN:STD``,
+``lognormal:MEDIAN:SIGMA`` or ``exp:MEAN`` (all in milliseconds). TTS replies
+are silent mp3s sized to the text, or canned files from ``--mp3-dir``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz, mono): 1152 samples.
+_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+_MP3_FRAME_SEC = 1152 / 44100
+
+_CANNED_DIALOGUE = {
+    "dialogue": [
+        {"speaker": "CARTOON_DAD", "line": "So a stub server is just a fake internet, right? Show me one for my toaster."},
+        {"speaker": "JOHN", "line": "Close! It imitates a real API locally, so tests run fast and offline. Your toaster stub would answer 'toast ready' after two seconds, every time."},
+        {"speaker": "CARTOON_DAD", "line": "Fake toaster, real tests. Thanks John!"},
+    ]
+}
+
+
+def silent_mp3(seconds: float) -> bytes:
+    """Return a silent mp3 payload lasting roughly ``seconds``."""
+    frames = max(1, int(seconds / _MP3_FRAME_SEC))
+    return _MP3_FRAME * frames
+
+
+def sample_latency_ms(spec: str) -> float:
+    """Draw one latency (ms) from a ``kind:params`` spec such as ``lognormal:400:0.5``."""
+    kind, _, rest = spec.partition(":")
+    params = [float(value) for value in rest.split(":") if value]
+    if kind == "fixed":
+        return params[0]
+    if kind == "uniform":
+        return random.uniform(params[0], params[1])
+    if kind == "normal":
+        return max(0.0, random.gauss(params[0], params[1]))
+    if kind == "lognormal":
+        return random.lognormvariate(math.log(params[0]), params[1])
+    if kind == "exp":
+        return random.expovariate(1.0 / params[0])
+    raise ValueError(f"Unknown latency distribution '{spec}'.")
+
+
+class StubConfig:
+    """Latency and error injection knobs shared by every request handler."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (429, 503),
+        chars_per_sec: float = 15.0,
+        latency: Optional[str] = None,
+        per_char_ms: float = 0.0,
+        mp3_dir: Optional[str] = None,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.chars_per_sec = chars_per_sec
+        self.latency = latency
+        self.per_char_ms = per_char_ms
+        self.canned_mp3s = _load_mp3s(mp3_dir) if mp3_dir else []
+        self.counts: Dict[str, int] = {"requests": 0, "errors": 0}
+        self.lock = threading.Lock()
+
+    def delay_sec(self, chars: int = 0) -> float:
+        if self.latency:
+            base = sample_latency_ms(self.latency)
+        else:
+            base = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, base + chars * self.per_char_ms) / 1000.0
+
+    def tts_payload(self, text: str) -> bytes:
+        if self.canned_mp3s:
+            return random.choice(self.canned_mp3s)
+        return silent_mp3(len(text) / max(self.chars_per_sec, 1.0))
+
+    def injected_status(self) -> Optional[int]:
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            return random.choice(self.error_statuses)
+        return None
+
+
+def _make_handler(config: StubConfig) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] | None = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            with config.lock:
+                config.counts["requests"] += 1
+            time.sleep(config.delay_sec(len(str(body.get("text", "")))))
+
+            status = config.injected_status()
+            if status is not None:
+                with config.lock:
+                    config.counts["errors"] += 1
+                payload = json.dumps({"error": {"message": f"injected {status}", "type": "stub"}}).encode()
+                self._send(status, payload, "application/json", {"Retry-After": "0.1"} if status == 429 else None)
+                return
+
+            if self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(200, json.dumps(_chat_response(body)).encode(), "application/json")
+            elif "/text-to-speech/" in self.path:
+                self._send(200, config.tts_payload(str(body.get("text", ""))), "audio/mpeg")
+            else:
+                self._send(404, b'{"error": "not found"}', "application/json")
+
+    return _Handler
+
+
+def _load_mp3s(mp3_dir: str) -> list[bytes]:
+    payloads = []
+    for name in sorted(os.listdir(mp3_dir)):
+        if name.lower().endswith(".mp3"):
+            with open(os.path.join(mp3_dir, name), "rb") as f:
+                payloads.append(f.read())
+    if not payloads:
+        raise ValueError(f"No .mp3 files found in {mp3_dir}.")
+    return payloads
+
+
+def _chat_response(request: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(_CANNED_DIALOGUE)},
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def start_stub_server(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the stub in a daemon thread; the bound port is ``server.server_port``."""
+    server = ThreadingHTTPServer((host, port), _make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local OpenAI/ElevenLabs stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--latency", help="Latency distribution, e.g. lognormal:400:0.5 (overrides --latency-ms)")
+    parser.add_argument("--per-char-ms", type=float, default=0.0, help="Extra TTS latency per input character")
+    parser.add_argument("--mp3-dir", help="Serve canned mp3 files from this directory for TTS")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", default="429,503", help="Comma-separated statuses to inject")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=[int(code) for code in args.error_statuses.split(",") if code],
+        latency=args.latency,
+        per_char_ms=args.per_char_ms,
+        mp3_dir=args.mp3_dir,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(config))
+    print(f"Stub API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
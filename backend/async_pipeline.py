@@ -0,0 +1,92 @@
+"""Asyncio pipeline that overlaps STT, dialogue and TTS across many requests.
+
+Each stage has its own concurrency limit, so one request can be synthesizing
+voices while others wait on the LLM or on Whisper, all on a single event loop
+instead of a thread per request::
+
+    results = asyncio.run(run_many([{"topic": "black holes"}, {"audio_path": "q.wav"}]))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from backend.ai_service import generate_dialogue_async
+from backend.tts_service import synthesize_dialogue_async
+
+_logger = logging.getLogger(__name__)
+
+
+async def run_duo_request(
+    request: Dict[str, Any],
+    limits: Dict[str, asyncio.Semaphore],
+    pause_ms: int = 250,
+    logger: Optional[logging.Logger] = None,
+) -> Dict[str, Any]:
+    """Run one ``{"topic"|"audio_path": ...}`` request through STT, dialogue and TTS.
+
+    Returns the topic, dialogue, timed dialogue, stitched mp3 bytes and
+    per-stage timings (transcribe, dialogue, tts, stitch). ``limits`` maps
+    stage name to the semaphore bounding it.
+    """
+    active_logger = logger or _logger
+    timings: Dict[str, float] = {}
+
+    topic = request.get("topic")
+    if not topic:
+        from backend.stt_service import transcribe_audio_async
+
+        async with limits["transcribe"]:
+            started = time.perf_counter()
+            topic = await transcribe_audio_async(request["audio_path"], logger=active_logger)
+            timings["transcribe"] = time.perf_counter() - started
+
+    async with limits["dialogue"]:
+        started = time.perf_counter()
+        dialogue = await generate_dialogue_async(topic, logger=active_logger)
+        timings["dialogue"] = time.perf_counter() - started
+
+    async with limits["tts"]:
+        final_audio, timed_dialogue = await synthesize_dialogue_async(
+            dialogue, pause_ms=pause_ms, logger=active_logger, timings=timings
+        )
+
+    return {
+        "topic": topic,
+        "dialogue": dialogue,
+        "timed_dialogue": timed_dialogue,
+        "audio": final_audio,
+        "timings": timings,
+    }
+
+
+async def run_many(
+    requests: Sequence[Dict[str, Any]],
+    *,
+    transcribe_concurrency: int = 1,
+    dialogue_concurrency: int = 32,
+    tts_concurrency: int = 16,
+    pause_ms: int = 250,
+    logger: Optional[logging.Logger] = None,
+) -> List[Dict[str, Any]]:
+    """Run all ``requests`` concurrently; failures come back as ``{"error": ...}``."""
+    limits = {
+        "transcribe": asyncio.Semaphore(max(transcribe_concurrency, 1)),
+        "dialogue": asyncio.Semaphore(max(dialogue_concurrency, 1)),
+        "tts": asyncio.Semaphore(max(tts_concurrency, 1)),
+    }
+    outcomes = await asyncio.gather(
+        *(run_duo_request(request, limits, pause_ms=pause_ms, logger=logger) for request in requests),
+        return_exceptions=True,
+    )
+    results: List[Dict[str, Any]] = []
+    for request, outcome in zip(requests, outcomes):
+        if isinstance(outcome, BaseException):
+            (logger or _logger).error("Duo request %s failed: %s", request, outcome)
+            results.append({"request": request, "error": str(outcome)})
+        else:
+            results.append({"request": request, **outcome})
+    return results
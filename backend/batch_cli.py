@@ -0,0 +1,323 @@
+"""Headless batch runner that turns a JSONL topic list into Shorts.
+
+Usage::
+
+    python -m backend.batch_cli topics.jsonl --out temp/batch --bg-dir temp/brainRotVideos
+
+Each input line is a JSON object with ``topic`` or ``audio_path`` and
+optionally ``id`` and ``bg_video_path``. API stages (transcribe, dialogue,
+TTS) run in a thread pool while renders run in a separate process pool, so
+network waits overlap with encoding. Every finished stage is checkpointed to
+``<out>/<id>/state.json``; rerunning the same command resumes from there.
+
+With ``--queue`` the items are submitted as full jobs to the render queue
+instead, and ``backend.render_worker`` processes run every stage.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+_logger = logging.getLogger(__name__)
+
+
+def _item_id(item: Dict[str, Any]) -> str:
+    if item.get("id"):
+        return str(item["id"])
+    return hashlib.sha1(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _load_items(path: str) -> Dict[str, Dict[str, Any]]:
+    """Items keyed by ``_item_id`` in input order.
+
+    Items share a checkpoint directory per id, so repeated lines are dropped
+    and two different items claiming the same ``id`` are rejected.
+    """
+    items: Dict[str, Dict[str, Any]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not item.get("topic") and not item.get("audio_path"):
+                raise ValueError(f"Line {line_no}: each item needs 'topic' or 'audio_path'.")
+            item_id = _item_id(item)
+            if item_id in items:
+                if items[item_id] != item:
+                    raise ValueError(f"Line {line_no}: id '{item_id}' is already used by a different item.")
+                _logger.warning("Line %s duplicates item %s; skipping it", line_no, item_id)
+                continue
+            items[item_id] = item
+    return items
+
+
+def _load_state(item_dir: str) -> Dict[str, Any]:
+    state_path = os.path.join(item_dir, "state.json")
+    if not os.path.exists(state_path):
+        return {"timings": {}}
+    with open(state_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(item_dir: str, state: Dict[str, Any]) -> None:
+    state_path = os.path.join(item_dir, "state.json")
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+
+def _pick_background(item: Dict[str, Any], bg_video: Optional[str], bg_dir: Optional[str]) -> str:
+    if item.get("bg_video_path"):
+        return str(item["bg_video_path"])
+    if bg_video:
+        return bg_video
+    if bg_dir and os.path.isdir(bg_dir):
+        choices = sorted(f for f in os.listdir(bg_dir) if f.lower().endswith(".mp4"))
+        if choices:
+            return os.path.join(bg_dir, random.choice(choices))
+    raise RuntimeError("No background video: pass --bg-video/--bg-dir or set bg_video_path per item.")
+
+
+def _prepare_item(
+    item: Dict[str, Any],
+    item_dir: str,
+    pause_ms: int,
+    bg_video: Optional[str],
+    bg_dir: Optional[str],
+) -> Dict[str, Any]:
+    """Run (or resume) the API stages for one item and return its checkpoint."""
+    os.makedirs(item_dir, exist_ok=True)
+    state = _load_state(item_dir)
+    timings = state.setdefault("timings", {})
+
+    if not state.get("topic"):
+        if item.get("topic"):
+            state["topic"] = str(item["topic"])
+        else:
+            from backend.stt_service import transcribe_audio
+
+            # Runs on the API pool, but transcribe_audio serializes calls on the
+            # shared Whisper model itself.
+            started = time.perf_counter()
+            state["topic"] = transcribe_audio(item["audio_path"], logger=_logger)
+            timings["transcribe"] = time.perf_counter() - started
+        _save_state(item_dir, state)
+
+    if not state.get("dialogue"):
+        from backend.ai_service import generate_dialogue
+
+        started = time.perf_counter()
+        state["dialogue"] = generate_dialogue(state["topic"], logger=_logger)
+        timings["dialogue"] = time.perf_counter() - started
+        _save_state(item_dir, state)
+
+    duo_audio_path = os.path.join(item_dir, "dialogue.mp3")
+    if not state.get("timed_dialogue") or not os.path.exists(duo_audio_path):
+        from backend.tts_service import synthesize_dialogue
+
+        started = time.perf_counter()
+        final_audio, timed_dialogue = synthesize_dialogue(
+            state["dialogue"], pause_ms=pause_ms, logger=_logger
+        )
+        with open(duo_audio_path, "wb") as f:
+            f.write(final_audio)
+        state["timed_dialogue"] = timed_dialogue
+        state["duo_audio_path"] = duo_audio_path
+        timings["tts"] = time.perf_counter() - started
+        _save_state(item_dir, state)
+
+    if not state.get("bg_video_path"):
+        state["bg_video_path"] = _pick_background(item, bg_video, bg_dir)
+        _save_state(item_dir, state)
+    return state
+
+
+def _render_item(state: Dict[str, Any], output_path: str, threads: Optional[int]) -> float:
+    """Render in a worker process and return the elapsed seconds."""
+    from backend.shorts_renderer import render_shorts_video
+
+    started = time.perf_counter()
+    render_shorts_video(
+        state["timed_dialogue"],
+        audio_path=state["duo_audio_path"],
+        output_path=output_path,
+        bg_video_path=state["bg_video_path"],
+        threads=threads,
+    )
+    return time.perf_counter() - started
+
+
+def run_batch(
+    input_path: str,
+    out_dir: str,
+    *,
+    api_concurrency: int = 4,
+    render_concurrency: int = 1,
+    pause_ms: int = 250,
+    bg_video: Optional[str] = None,
+    bg_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Process every item in ``input_path`` and append rows to ``<out>/results.jsonl``."""
+    items = _load_items(input_path)
+    os.makedirs(out_dir, exist_ok=True)
+    results_path = os.path.join(out_dir, "results.jsonl")
+    render_threads = max(1, (os.cpu_count() or 1) // max(render_concurrency, 1))
+    rows: List[Dict[str, Any]] = []
+
+    def _record(item_id: str, status: str, state: Dict[str, Any], started: float, error: str | None = None) -> None:
+        row = {
+            "id": item_id,
+            "status": status,
+            "topic": state.get("topic"),
+            "output_path": state.get("output_path"),
+            "timings": state.get("timings", {}),
+            "wall_sec": time.perf_counter() - started,
+            "error": error,
+        }
+        rows.append(row)
+        with open(results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+        _logger.info("Item %s %s", item_id, status)
+
+    with ThreadPoolExecutor(max_workers=max(api_concurrency, 1)) as api_pool, ProcessPoolExecutor(
+        max_workers=max(render_concurrency, 1),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as render_pool:
+        pending: Dict[Future, tuple[str, str, str, float]] = {}
+        for item_id, item in items.items():
+            item_dir = os.path.join(out_dir, item_id)
+            future = api_pool.submit(_prepare_item, item, item_dir, pause_ms, bg_video, bg_dir)
+            pending[future] = ("prepare", item_id, item_dir, time.perf_counter())
+
+        states: Dict[str, Dict[str, Any]] = {}
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, item_id, item_dir, started = pending.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as exc:
+                    _logger.exception("Item %s failed during %s", item_id, stage)
+                    _record(item_id, "failed", states.get(item_id) or _load_state(item_dir), started, f"{stage}: {exc}")
+                    continue
+
+                if stage == "prepare":
+                    state = outcome
+                    states[item_id] = state
+                    output_path = os.path.join(item_dir, "short.mp4")
+                    if state.get("output_path") and os.path.exists(state["output_path"]):
+                        _record(item_id, "done", state, started)
+                        continue
+                    render_future = render_pool.submit(_render_item, state, output_path, render_threads)
+                    pending[render_future] = ("render", item_id, item_dir, started)
+                else:
+                    state = states[item_id]
+                    state["timings"]["render"] = outcome
+                    state["output_path"] = os.path.join(item_dir, "short.mp4")
+                    _save_state(item_dir, state)
+                    _record(item_id, "done", state, started)
+    return rows
+
+
+def submit_batch(
+    input_path: str,
+    out_dir: str,
+    *,
+    pause_ms: int = 250,
+    bg_video: Optional[str] = None,
+    bg_dir: Optional[str] = None,
+) -> List[Dict[str, str]]:
+    """Queue every item as a full job and append ``{id, job_id}`` rows to ``<out>/jobs.jsonl``.
+
+    Like ``run_batch`` this resumes: items already rendered (by an earlier
+    batch run or queued job) or whose last job is still queued/running are
+    skipped.
+    """
+    from backend.job_queue import get_job, submit_job
+
+    items = _load_items(input_path)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs_path = os.path.join(out_dir, "jobs.jsonl")
+    previous_jobs: Dict[str, str] = {}
+    if os.path.exists(jobs_path):
+        with open(jobs_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    previous_jobs[row["id"]] = row["job_id"]
+    rows: List[Dict[str, str]] = []
+    for item_id, item in items.items():
+        item_dir = os.path.join(out_dir, item_id)
+        state = _load_state(item_dir)
+        if state.get("output_path") and os.path.exists(state["output_path"]):
+            _logger.info("Item %s already rendered; skipping", item_id)
+            continue
+        previous = get_job(previous_jobs[item_id]) if item_id in previous_jobs else None
+        if previous is not None and (
+            previous["status"] in ("queued", "running")
+            or (previous["status"] == "done" and os.path.exists(previous["payload"]["output_path"]))
+        ):
+            _logger.info("Item %s already %s as job %s; skipping", item_id, previous["status"], previous["id"])
+            continue
+        payload: Dict[str, Any] = {
+            "bg_video_path": _pick_background(item, bg_video, bg_dir),
+            "pause_ms": pause_ms,
+            "duo_audio_path": os.path.join(item_dir, "dialogue.mp3"),
+            "output_path": os.path.join(item_dir, "short.mp4"),
+        }
+        if item.get("topic"):
+            payload["topic"] = str(item["topic"])
+        else:
+            payload["audio_path"] = str(item["audio_path"])
+        row = {"id": item_id, "job_id": submit_job(payload)}
+        rows.append(row)
+        with open(jobs_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row) + "\n")
+        _logger.info("Item %s queued as job %s", item_id, row["job_id"])
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render Duo Mode Shorts for every item in a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one {'topic'|'audio_path', ...} object per line")
+    parser.add_argument("--out", default=os.path.join("temp", "batch"), help="Output/checkpoint directory")
+    parser.add_argument("--api-concurrency", type=int, default=4, help="Parallel STT/LLM/TTS items")
+    parser.add_argument("--render-concurrency", type=int, default=1, help="Parallel render processes")
+    parser.add_argument("--pause-ms", type=int, default=250)
+    parser.add_argument("--bg-video", help="Background video used for every item")
+    parser.add_argument("--bg-dir", default=os.path.join("temp", "brainRotVideos"), help="Pick a random background from here")
+    parser.add_argument("--queue", action="store_true", help="Submit full jobs to the render queue instead of running here")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+    if args.queue:
+        queued = submit_batch(args.input, args.out, pause_ms=args.pause_ms, bg_video=args.bg_video, bg_dir=args.bg_dir)
+        print(f"Queued {len(queued)} jobs. Job ids: {os.path.join(args.out, 'jobs.jsonl')}")
+        return
+    rows = run_batch(
+        args.input,
+        args.out,
+        api_concurrency=args.api_concurrency,
+        render_concurrency=args.render_concurrency,
+        pause_ms=args.pause_ms,
+        bg_video=args.bg_video,
+        bg_dir=args.bg_dir,
+    )
+    failed = sum(1 for row in rows if row["status"] != "done")
+    print(f"Processed {len(rows)} items ({failed} failed). Results: {os.path.join(args.out, 'results.jsonl')}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Publish the playable prefix of a fragmented MP4 while ffmpeg is still writing it.
+
+With ``-movflags frag_keyframe+empty_moov`` ffmpeg writes ``ftyp`` + ``moov``
+up front and then one ``moof`` + ``mdat`` pair per keyframe interval. Every
+byte up to the end of the last complete ``mdat`` is a valid, playable file.
+``FragmentPublisher`` polls the output during the encode. It records that
+prefix in a ``<output>.published`` sidecar, which ``backend/media_server.py``
+uses to cap what it serves. The sidecar is removed once the file is complete.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+FRAGMENT_MOVFLAGS = "frag_keyframe+empty_moov+default_base_moof"
+
+
+def published_path(output_path: str) -> str:
+    return f"{output_path}.published"
+
+
+def published_state(output_path: str) -> Optional[Dict[str, Any]]:
+    """The sidecar contents, or None when the file is not being written progressively."""
+    try:
+        with open(published_path(output_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class _BoxScanner:
+    """Walks top-level MP4 boxes incrementally, remembering where it stopped."""
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.published = 0
+        self.fragments = 0
+        self._has_moov = False
+        self._pending_moof = False
+
+    def advance(self, path: str) -> Tuple[int, int]:
+        try:
+            size = os.path.getsize(path)
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return self.published, self.fragments
+        with f:
+            while self.offset + 8 <= size:
+                f.seek(self.offset)
+                header = f.read(16)
+                box_size, box_type = struct.unpack(">I4s", header[:8])
+                if box_size == 1 and len(header) == 16:
+                    box_size = struct.unpack(">Q", header[8:16])[0]
+                if box_size < 8 or self.offset + box_size > size:
+                    # Size 0 ("runs to EOF") or a box ffmpeg has not finished yet.
+                    break
+                self.offset += box_size
+                if box_type == b"moov":
+                    self._has_moov = True
+                elif box_type == b"moof":
+                    self._pending_moof = True
+                elif box_type == b"mdat" and self._pending_moof and self._has_moov:
+                    self._pending_moof = False
+                    self.fragments += 1
+                    self.published = self.offset
+        return self.published, self.fragments
+
+
+def complete_prefix(path: str) -> Tuple[int, int]:
+    """Return ``(bytes, fragments)`` covering the init segment and every finished fragment."""
+    return _BoxScanner().advance(path)
+
+
+class FragmentPublisher:
+    """Background thread that keeps ``<output>.published`` in step with the encode."""
+
+    def __init__(self, output_path: str, fragment_sec: float, interval_sec: float = 0.5) -> None:
+        self.output_path = output_path
+        self.fragment_sec = fragment_sec
+        self.interval_sec = interval_sec
+        self._scanner = _BoxScanner()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._last_fragments = -1
+
+    def __enter__(self) -> "FragmentPublisher":
+        # A leftover file at this path would otherwise be published before
+        # ffmpeg truncates it.
+        for path in (self.output_path, published_path(self.output_path)):
+            if os.path.exists(path):
+                os.remove(path)
+        self._write(0, 0)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        if os.path.exists(published_path(self.output_path)):
+            os.remove(published_path(self.output_path))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_sec):
+            published, fragments = self._scanner.advance(self.output_path)
+            if fragments != self._last_fragments:
+                self._write(published, fragments)
+
+    def _write(self, published: int, fragments: int) -> None:
+        self._last_fragments = fragments
+        path = published_path(self.output_path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"bytes": published, "fragments": fragments, "seconds": fragments * self.fragment_sec}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,209 @@
+"""SQLite-backed job queue for Duo Mode renders."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterator, Optional
+import uuid
+
+_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join("database", "db.sqlite"))
+# A running job whose row has not been touched for this long is assumed to
+# belong to a dead worker and is put back on the queue.
+_STALE_AFTER_SEC = float(os.getenv("JOB_STALE_AFTER_SEC", "900"))
+# Workers touch their job this often while a stage runs (a single OpenAI call
+# can outlast the stale window with retries), well inside _STALE_AFTER_SEC.
+HEARTBEAT_INTERVAL_SEC = _STALE_AFTER_SEC / 4
+
+STAGES = ("transcribe", "dialogue", "tts", "render")
+TERMINAL_STATUSES = ("done", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the job it is running has been cancelled."""
+
+
+class JobLost(JobCancelled):
+    """Raised when a worker's job was requeued as stale and now belongs to someone else."""
+
+
+@contextmanager
+def _connect(db_path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    conn = sqlite3.connect(db_path or _DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        yield conn
+    finally:
+        conn.close()
+
+
+def init_db(db_path: Optional[str] = None) -> None:
+    """Create the jobs table if it does not exist yet."""
+    os.makedirs(os.path.dirname(db_path or _DB_PATH) or ".", exist_ok=True)
+    with _connect(db_path) as conn:
+        conn.executescript(_SCHEMA)
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def submit_job(payload: Dict[str, Any], db_path: Optional[str] = None) -> str:
+    """Queue a job and return its id."""
+    init_db(db_path)
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, status, payload, created_at, updated_at) "
+            "VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, json.dumps(payload), now, now),
+        )
+    return job_id
+
+
+def get_job(job_id: str, db_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Return the job row as a dict, or None when the id is unknown."""
+    init_db(db_path)
+    with _connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def request_cancel(job_id: str, db_path: Optional[str] = None) -> None:
+    """Cancel a job; queued jobs stop immediately, running ones at the next check."""
+    init_db(db_path)
+    now = time.time()
+    with _connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+            (now, job_id),
+        )
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = 'running'",
+            (now, job_id),
+        )
+
+
+def claim_next_job(worker: str, db_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Atomically move the oldest queued job to running and return it."""
+    with _connect(db_path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND updated_at < ?",
+                (time.time() - _STALE_AFTER_SEC,),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, updated_at = ? WHERE id = ?",
+                (worker, time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    job = _row_to_job(row)
+    job["status"] = "running"
+    job["worker"] = worker
+    return job
+
+
+def update_progress(
+    job_id: str,
+    stage: str,
+    progress: float,
+    db_path: Optional[str] = None,
+    worker: Optional[str] = None,
+) -> None:
+    """Record stage progress (0-1) and raise JobCancelled if a cancel is pending.
+
+    With ``worker`` the update only applies while that worker still owns the
+    running job; otherwise JobLost is raised so the worker stops.
+    """
+    params = [stage, max(0.0, min(progress, 1.0)), time.time(), job_id]
+    fence = ""
+    if worker is not None:
+        fence = " AND worker = ? AND status = 'running'"
+        params.append(worker)
+    with _connect(db_path) as conn:
+        updated = conn.execute(
+            f"UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ?{fence}",
+            params,
+        ).rowcount
+        row = conn.execute(
+            "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    if worker is not None and not updated:
+        raise JobLost(job_id)
+    if row is not None and row["cancel_requested"]:
+        raise JobCancelled(job_id)
+
+
+def heartbeat(job_id: str, worker: str, db_path: Optional[str] = None) -> bool:
+    """Refresh a running job's ``updated_at``; False once ``worker`` no longer owns it."""
+    with _connect(db_path) as conn:
+        updated = conn.execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time(), job_id, worker),
+        ).rowcount
+    return bool(updated)
+
+
+def finish_job(
+    job_id: str,
+    status: str,
+    result: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    db_path: Optional[str] = None,
+    worker: Optional[str] = None,
+) -> bool:
+    """Move a job to a terminal status ("done", "failed" or "cancelled").
+
+    With ``worker`` this is a no-op (returning False) unless that worker still
+    owns the running job, so a requeued job's old worker cannot overwrite it.
+    """
+    if status not in TERMINAL_STATUSES:
+        raise ValueError(f"Unknown terminal job status: {status}")
+    params = [status, json.dumps(result) if result is not None else None, error, time.time(), job_id]
+    fence = ""
+    if worker is not None:
+        fence = " AND worker = ? AND status = 'running'"
+        params.append(worker)
+    with _connect(db_path) as conn:
+        updated = conn.execute(
+            f"UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?{fence}",
+            params,
+        ).rowcount
+    return bool(updated)
@@ -0,0 +1,186 @@
+"""Offline end-to-end load test for the Duo Mode API stages.
+
+Starts local OpenAI and ElevenLabs stand-ins (``backend/api_stub_server.py``),
+points the real backend clients at them, and drives the production async path
+(``async_pipeline.run_duo_request``: dialogue -> TTS -> stitch) at increasing
+concurrency::
+
+    python -m backend.load_test --levels 1,2,4,8,16,32 --llm-latency lognormal:2500:0.6 \\
+        --tts-latency lognormal:600:0.4 --error-rate 0.02
+
+For each level it reports throughput, p50/p95/p99 latency per stage and the
+error count, then names the saturation point: the last level where adding
+concurrency still raised throughput by at least ``--saturation-gain``, or
+"not reached" if throughput never levels off.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.api_stub_server import StubConfig, start_stub_server
+
+_STAGES = ("dialogue", "tts", "stitch", "total")
+_TOPICS = ("black holes", "compound interest", "decision trees", "photosynthesis", "TCP handshakes")
+
+
+def _point_backend_at(openai_url: str, elevenlabs_url: str) -> None:
+    # Must run before backend.ai_service / backend.tts_service are imported:
+    # they read these at import time. Stub keys make sure nothing real is hit.
+    os.environ["OPENAI_BASE_URL"] = openai_url
+    os.environ["ELEVENLABS_BASE_URL"] = elevenlabs_url
+    os.environ["OPENAI_API_KEY"] = "stub"
+    os.environ["ELEVENLABS_API_KEY"] = "stub"
+    os.environ["VOICE_ID_JOHN"] = "stub-john"
+    os.environ["VOICE_ID_CARTOON_DAD"] = "stub-dad"
+    os.environ["TTS_ENGINE"] = "elevenlabs"
+    os.environ.setdefault("TRACE_ENABLED", "0")
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _one_request(topic: str, limits: Dict[str, asyncio.Semaphore]) -> Dict[str, float]:
+    from backend.async_pipeline import run_duo_request
+
+    started = time.perf_counter()
+    result = await run_duo_request({"topic": topic}, limits)
+    timings = dict(result["timings"])
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+async def run_level(concurrency: int, total_requests: int) -> Dict[str, Any]:
+    """Closed loop: ``concurrency`` workers issue ``total_requests`` back to back."""
+    # The closed loop already bounds concurrency, so the stage limits never bind.
+    limits = {stage: asyncio.Semaphore(max(concurrency, 1)) for stage in ("transcribe", "dialogue", "tts")}
+    samples: List[Dict[str, float]] = []
+    errors: List[str] = []
+    issued = 0
+
+    async def worker() -> None:
+        nonlocal issued
+        while issued < total_requests:
+            topic = _TOPICS[issued % len(_TOPICS)]
+            issued += 1
+            try:
+                samples.append(await _one_request(topic, limits))
+            except Exception as exc:
+                errors.append(f"{type(exc).__name__}: {exc}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    stages = {}
+    for stage in _STAGES:
+        values = [sample[stage] for sample in samples]
+        stages[stage] = {
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "p99": _percentile(values, 99),
+            "mean": statistics.fmean(values) if values else None,
+        }
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "ok": len(samples),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_sec": wall,
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "stages": stages,
+    }
+
+
+async def run_levels(concurrencies: List[int], requests_per_worker: int) -> List[Dict[str, Any]]:
+    # One event loop for every level: the pooled async HTTP clients are bound to it.
+    levels = []
+    for concurrency in concurrencies:
+        result = await run_level(concurrency, concurrency * max(requests_per_worker, 1))
+        levels.append(result)
+        cells = "  ".join(
+            "/".join(_fmt(result["stages"][stage][pct]) for pct in ("p50", "p95", "p99")) for stage in _STAGES
+        )
+        print(f"{concurrency:>5} {result['throughput_rps']:>7.2f} {result['errors']:>4}  {cells}")
+    return levels
+
+
+def saturation_point(levels: List[Dict[str, Any]], min_gain: float) -> Optional[int]:
+    """Last concurrency level whose throughput beat the previous one by ``min_gain``.
+
+    Levels with no successful requests are skipped. Returns None when
+    throughput never levels off (saturation was not reached).
+    """
+    measured = [level for level in levels if level["ok"] > 0]
+    for previous, current in zip(measured, measured[1:]):
+        if current["throughput_rps"] < previous["throughput_rps"] * (1.0 + min_gain):
+            return previous["concurrency"]
+    return None
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:7.3f}" if value is not None else "    n/a"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load test against local API stand-ins.")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests-per-worker", type=int, default=3)
+    parser.add_argument("--llm-latency", default="lognormal:2500:0.6", help="Chat-completions latency spec (ms)")
+    parser.add_argument("--tts-latency", default="lognormal:500:0.4", help="Text-to-speech latency spec (ms)")
+    parser.add_argument("--tts-per-char-ms", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mp3-dir", help="Canned mp3 payloads for TTS replies")
+    parser.add_argument("--saturation-gain", type=float, default=0.10)
+    parser.add_argument("--out", default=os.path.join("temp", "load_test.json"))
+    args = parser.parse_args()
+
+    llm_stub = start_stub_server(StubConfig(latency=args.llm_latency, error_rate=args.error_rate))
+    tts_stub = start_stub_server(
+        StubConfig(
+            latency=args.tts_latency,
+            per_char_ms=args.tts_per_char_ms,
+            error_rate=args.error_rate,
+            mp3_dir=args.mp3_dir,
+        )
+    )
+    _point_backend_at(
+        f"http://127.0.0.1:{llm_stub.server_port}/v1",
+        f"http://127.0.0.1:{tts_stub.server_port}",
+    )
+
+    print(f"{'conc':>5} {'rps':>7} {'err':>4}  " + "  ".join(f"{stage + ' p50/p95/p99':>23}" for stage in _STAGES))
+    levels = asyncio.run(
+        run_levels([int(level) for level in args.levels.split(",") if level], args.requests_per_worker)
+    )
+
+    saturation = saturation_point(levels, args.saturation_gain)
+    if saturation is None:
+        print("Saturation point: not reached (throughput still rising, or no successful levels)")
+    else:
+        print(f"Saturation point: concurrency {saturation}")
+    report = {
+        "config": vars(args),
+        "levels": levels,
+        "saturation_concurrency": saturation,
+    }
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
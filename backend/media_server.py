@@ -0,0 +1,180 @@
+"""Stream rendered videos from disk over HTTP, in chunks and with Range support.
+
+``st.video`` and ``st.download_button`` load the whole MP4 into memory. This
+server reads ``MEDIA_CHUNK_BYTES`` at a time instead and lets the browser
+seek. It also serves a render that is still encoding: for a fragmented MP4
+it stops at the prefix published by ``backend/fragmented_mp4.py``::
+
+    start_media_server("temp/renders")
+    st.video(media_url("temp/renders/<job_id>.mp4"))
+
+The server is opt-in: it only starts when ``MEDIA_PUBLIC_URL`` (the base URL
+the browser should use, e.g. a reverse proxy in front of it) is set. It has
+no authentication, so it binds ``MEDIA_HOST`` (default ``127.0.0.1``) on
+``MEDIA_PORT`` (default 8599) and serves only the ``.mp4`` files directly in
+its root.
+"""
+
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import mimetypes
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlparse
+
+from backend.fragmented_mp4 import published_state
+
+_PORT = int(os.getenv("MEDIA_PORT", "8599"))
+_HOST = os.getenv("MEDIA_HOST", "127.0.0.1")
+_PUBLIC_URL = os.getenv("MEDIA_PUBLIC_URL", "").rstrip("/")
+_SERVED_EXTENSIONS = (".mp4",)
+_CHUNK_BYTES = int(os.getenv("MEDIA_CHUNK_BYTES", str(256 * 1024)))
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+_media_server: Optional[ThreadingHTTPServer] = None
+_media_root: Optional[str] = None
+
+
+def _servable_length(path: str, upto: Optional[int]) -> int:
+    size = os.path.getsize(path)
+    state = published_state(path)
+    if state is not None:
+        size = min(size, int(state["bytes"]))
+    return min(size, upto) if upto is not None else size
+
+
+def _parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    match = _RANGE_RE.match(header or "")
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    if not match.group(1):
+        start = max(0, length - int(match.group(2)))
+        end = length - 1
+    else:
+        start = int(match.group(1))
+        end = min(int(match.group(2)), length - 1) if match.group(2) else length - 1
+    return start, end
+
+
+def _make_handler(root: str) -> type[BaseHTTPRequestHandler]:
+    class _MediaHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def do_HEAD(self) -> None:
+            self._serve(send_body=False)
+
+        def do_GET(self) -> None:
+            self._serve(send_body=True)
+
+        def _serve(self, send_body: bool) -> None:
+            url = urlparse(self.path)
+            name = unquote(url.path.lstrip("/"))
+            query = parse_qs(url.query)
+            path = os.path.join(root, name)
+            if (
+                not name
+                or os.path.basename(name) != name
+                or not name.lower().endswith(_SERVED_EXTENSIONS)
+                or not os.path.isfile(path)
+            ):
+                self.send_error(404)
+                return
+            try:
+                upto = max(0, int(query["upto"][0])) if "upto" in query else None
+            except ValueError:
+                self.send_error(400, "Bad upto")
+                return
+            length = _servable_length(path, upto)
+            if length <= 0:
+                self.send_error(404, "Not published yet")
+                return
+
+            byte_range = _parse_range(self.headers.get("Range"), length)
+            if byte_range is not None and (byte_range[0] > byte_range[1] or byte_range[0] >= length):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{length}")
+                self.end_headers()
+                return
+            start, end = byte_range or (0, length - 1)
+            self.send_response(206 if byte_range else 200)
+            self.send_header("Content-Type", mimetypes.guess_type(name)[0] or "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Cache-Control", "no-store")
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{length}")
+            if "download" in query:
+                # The value ends up in a header, so keep only filename-safe characters.
+                file_name = _UNSAFE_FILENAME_RE.sub("", query["download"][0]) or name
+                self.send_header("Content-Disposition", f"attachment; filename=\"{file_name}\"")
+            self.end_headers()
+            if not send_body:
+                return
+
+            remaining = end - start + 1
+            with open(path, "rb") as f:
+                f.seek(start)
+                while remaining > 0:
+                    chunk = f.read(min(_CHUNK_BYTES, remaining))
+                    if not chunk:
+                        break
+                    try:
+                        self.wfile.write(chunk)
+                    except (BrokenPipeError, ConnectionResetError):  # player seeked or tab closed
+                        return
+                    remaining -= len(chunk)
+
+    return _MediaHandler
+
+
+def media_enabled() -> bool:
+    """Whether renders are served to the browser (``MEDIA_PUBLIC_URL`` set, port not 0)."""
+    return bool(_PUBLIC_URL) and _PORT != 0
+
+
+def start_media_server(root: str, port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve videos in ``root`` from a daemon thread; repeated calls reuse the server.
+
+    Returns None when disabled (no ``MEDIA_PUBLIC_URL`` or port 0) or when
+    another process already owns the port (e.g. a second app instance
+    serving the same renders directory).
+    """
+    global _media_server, _media_root
+    if _media_server is not None:
+        return _media_server
+    port = _PORT if port is None else port
+    host = _HOST if host is None else host
+    _media_root = os.path.abspath(root)
+    if not _PUBLIC_URL or port == 0:
+        return None
+    try:
+        _media_server = ThreadingHTTPServer((host, port), _make_handler(_media_root))
+    except OSError:
+        return None
+    _media_server.daemon_threads = True
+    threading.Thread(target=_media_server.serve_forever, daemon=True).start()
+    return _media_server
+
+
+def media_url(path: str, *, upto: Optional[int] = None, download: Optional[str] = None) -> Optional[str]:
+    """Browser URL for ``path``, or None when serving is disabled or ``path`` is not servable.
+
+    ``upto`` pins a snapshot of a file that is still growing; ``download``
+    makes the browser save it under that file name.
+    """
+    if _media_root is None or not media_enabled():
+        return None
+    if os.path.dirname(os.path.abspath(path)) != _media_root or not path.lower().endswith(_SERVED_EXTENSIONS):
+        return None
+    params: Dict[str, Any] = {}
+    if upto is not None:
+        params["upto"] = upto
+    if download is not None:
+        params["download"] = download
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{_PUBLIC_URL}/{quote(os.path.basename(path))}{query}"
@@ -0,0 +1,250 @@
+"""Offline benchmark suite for ``backend/shorts_renderer.py``.
+
+Generates every asset it needs (a moving-gradient background MP4, two
+character PNGs, a sine-tone WAV and a synthetic ``timed_dialogue``), then
+times caption building, per-frame compositing and full renders::
+
+    python -m backend.render_benchmark --out temp/bench/results.json
+    python -m backend.render_benchmark --baseline temp/bench/baseline.json --tolerance 0.15
+
+With ``--baseline`` the run exits non-zero if any metric regressed by more
+than the tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+import wave
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from backend import shorts_renderer
+
+WIDTH, HEIGHT = 1080, 1920
+_WORDS = (
+    "decision trees split data into branches by asking simple yes or no questions "
+    "until every leaf holds a clear answer like water the cactus today or wait"
+).split()
+
+
+def make_background(path: str, seconds: float = 12.0, fps: int = 30) -> str:
+    """Write a landscape MP4 with a scrolling gradient so decode/resize do real work."""
+    from moviepy import VideoClip
+
+    w, h = 1280, 720
+    xs = np.linspace(0, 255, w, dtype=np.float32)[None, :]
+    ys = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+
+    def frame(t: float) -> np.ndarray:
+        shift = t * 60.0
+        r = (xs + shift) % 256 + 0 * ys
+        g = (ys + shift * 0.5) % 256 + 0 * xs
+        b = np.full((h, w), (shift * 2) % 256, dtype=np.float32)
+        return np.stack([r, g, b], axis=-1).astype(np.uint8)
+
+    VideoClip(frame, duration=seconds).write_videofile(path, fps=fps, codec="libx264", logger=None)
+    return path
+
+
+def make_character(path: str, color: tuple[int, int, int]) -> str:
+    """Write an RGBA cutout-style PNG (transparent background, solid figure)."""
+    img = Image.new("RGBA", (800, 1100), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse([250, 40, 550, 340], fill=(*color, 255))
+    draw.rounded_rectangle([150, 360, 650, 1100], radius=120, fill=(*color, 255))
+    img.save(path)
+    return path
+
+
+def make_tone(path: str, seconds: float, freq: float = 220.0, rate: int = 44100) -> str:
+    """Write a mono 16-bit sine-tone WAV."""
+    t = np.arange(int(seconds * rate)) / rate
+    samples = (0.3 * np.sin(2 * np.pi * freq * t) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def make_timed_dialogue(lines: int, words_per_line: int = 30, sec_per_line: float = 4.0) -> List[Dict[str, object]]:
+    """Alternate CARTOON_DAD/JOHN lines back to back with 250ms pauses."""
+    dialogue: List[Dict[str, object]] = []
+    start = 0.0
+    for idx in range(lines):
+        text = " ".join(_WORDS[(idx * 7 + i) % len(_WORDS)] for i in range(words_per_line))
+        dialogue.append(
+            {
+                "speaker": "CARTOON_DAD" if idx % 2 == 0 else "JOHN",
+                "text": text,
+                "start": start,
+                "duration": sec_per_line,
+            }
+        )
+        start += sec_per_line + 0.25
+    return dialogue
+
+
+def _dialogue_seconds(timed_dialogue: List[Dict[str, object]]) -> float:
+    last = timed_dialogue[-1]
+    return float(last["start"]) + float(last["duration"])
+
+
+def _median_time(fn: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run_suite(work_dir: str, *, line_counts: List[int], repeat: int = 5, frames: int = 60) -> Dict[str, Any]:
+    os.makedirs(work_dir, exist_ok=True)
+    random.seed(0)
+    bg_path = make_background(os.path.join(work_dir, "bg.mp4"))
+    john_path = make_character(os.path.join(work_dir, "john.png"), (0, 160, 220))
+    dad_path = make_character(os.path.join(work_dir, "dad.png"), (230, 180, 0))
+    metrics: Dict[str, Dict[str, Any]] = {}
+
+    def record(name: str, value: float, unit: str, better: str) -> None:
+        metrics[name] = {"value": round(value, 5), "unit": unit, "better": better}
+        print(f"{name:<40} {value:>10.4f} {unit}")
+
+    sample_text = " ".join(_WORDS[:5])
+    record(
+        "make_safe_caption_clip",
+        _median_time(
+            lambda: shorts_renderer.make_safe_caption_clip(
+                sample_text, 0.0, 1.0, WIDTH, HEIGHT, speaker="JOHN", font="Menlo", font_size=72, stroke_width=6
+            ),
+            repeat,
+        ),
+        "s",
+        "lower",
+    )
+    line_text = str(make_timed_dialogue(1)[0]["text"])
+    record(
+        "five_word_caption_clips",
+        _median_time(
+            lambda: shorts_renderer.five_word_caption_clips(
+                line_text, 0.0, 4.0, WIDTH, HEIGHT, speaker="JOHN", font_size=72, font="Menlo", stroke_width=6
+            ),
+            repeat,
+        ),
+        "s",
+        "lower",
+    )
+
+    # Compositing throughput: pull frames straight from the composite,
+    # without ffmpeg encoding, spread across the whole timeline.
+    timed_dialogue = make_timed_dialogue(3)
+    audio_path = make_tone(os.path.join(work_dir, "tone_3.wav"), _dialogue_seconds(timed_dialogue))
+    composite = shorts_renderer.build_shorts_composite(
+        timed_dialogue, audio_path, bg_path, john_path=john_path, dad_path=dad_path
+    )
+    times = np.linspace(0, composite.duration - 1.0 / 30, frames)
+    composite.get_frame(0)
+    started = time.perf_counter()
+    for t in times:
+        composite.get_frame(float(t))
+    record("composite_frames_per_sec", frames / (time.perf_counter() - started), "fps", "higher")
+    composite.close()
+
+    for lines in line_counts:
+        timed_dialogue = make_timed_dialogue(lines)
+        seconds = _dialogue_seconds(timed_dialogue)
+        audio_path = make_tone(os.path.join(work_dir, f"tone_{lines}.wav"), seconds)
+        output_path = os.path.join(work_dir, f"render_{lines}.mp4")
+        started = time.perf_counter()
+        shorts_renderer.render_shorts_video(
+            timed_dialogue,
+            audio_path=audio_path,
+            output_path=output_path,
+            bg_video_path=bg_path,
+            john_path=john_path,
+            dad_path=dad_path,
+            # Pinned so RENDER_PROFILE / RENDER_FRAGMENTED can't change what is measured.
+            profile=False,
+            fragmented=False,
+        )
+        elapsed = time.perf_counter() - started
+        record(f"render_{lines}_lines", elapsed, "s", "lower")
+        record(f"render_{lines}_lines_realtime_factor", seconds / elapsed, "x", "higher")
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "env": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return a message per metric that regressed by more than ``tolerance`` or went missing."""
+    regressions = []
+    for name, base in baseline.get("metrics", {}).items():
+        current = results["metrics"].get(name)
+        if current is None:
+            print(f"{name:<40} {base['value']:>10.4f} -> {'missing':>10} MISSING")
+            regressions.append(f"{name} is missing from the current run")
+            continue
+        if not base["value"]:
+            continue
+        if base["better"] == "lower":
+            change = current["value"] / base["value"] - 1.0
+        else:
+            change = base["value"] / current["value"] - 1.0 if current["value"] else float("inf")
+        status = "REGRESSION" if change > tolerance else "ok"
+        print(f"{name:<40} {base['value']:>10.4f} -> {current['value']:>10.4f} ({change:+.1%} slower) {status}")
+        if change > tolerance:
+            regressions.append(f"{name} regressed {change:.1%} (tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Shorts renderer offline.")
+    parser.add_argument("--work-dir", default=os.path.join("temp", "bench"))
+    parser.add_argument("--out", default=os.path.join("temp", "bench", "results.json"))
+    parser.add_argument("--lines", default="1,3,6", help="Comma-separated dialogue lengths for full renders")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions for the caption microbenchmarks")
+    parser.add_argument("--frames", type=int, default=60, help="Frames sampled for compositing throughput")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before failing")
+    args = parser.parse_args()
+
+    results = run_suite(
+        args.work_dir,
+        line_counts=[int(n) for n in args.lines.split(",") if n],
+        repeat=args.repeat,
+        frames=args.frames,
+    )
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n".join(regressions))
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Opt-in per-frame profiler for ``render_shorts_video``.
+
+``build_shorts_composite`` hands each layer stage to ``RenderProfiler.wrap``
+as it builds it (background decode -> resize -> crop, character image and
+position, caption image -> bounce resize, and the composite itself). The
+stage's ``frame_function`` (and its mask's) is replaced with a timed version.
+moviepy chains stages by calling the previous clip's ``get_frame``, so nested
+calls are charged to a call stack and every stage gets its own self time.
+While encoding, ``FFMPEG_VideoWriter.write_frame`` is timed too. That is the
+time spent blocked writing raw frames into ffmpeg's stdin pipe. The writer is
+created inside moviepy, so ``write_frame`` is wrapped once for the process and
+only charges frames to the profiler active in the calling context; other
+renders running at the same time are not timed.
+
+Two reports are written next to the output video:
+
+* ``<output>.profile.txt``: a table of calls, calls/frame and self/inclusive
+  time per stage.
+* ``<output>.profile.folded``: collapsed stacks in microseconds, for
+  ``flamegraph.pl`` or speedscope.
+
+When no profiler is passed nothing is wrapped, so there is no per-frame cost.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_ROOT = "composite"
+_PIPE = "encode.pipe_write"
+
+_encoding: ContextVar[Optional["RenderProfiler"]] = ContextVar("render_profiler", default=None)
+_patch_lock = threading.Lock()
+_patched = False
+
+
+def _install_write_frame_hook() -> None:
+    """Wrap ``FFMPEG_VideoWriter.write_frame`` once so active profilers see pipe writes."""
+    global _patched
+    with _patch_lock:
+        if _patched:
+            return
+        from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+        original = FFMPEG_VideoWriter.write_frame
+
+        def write_frame(writer: Any, img_array: Any) -> Any:
+            profiler = _encoding.get()
+            if profiler is None:
+                return original(writer, img_array)
+            return profiler._call(_PIPE, original, writer, img_array)
+
+        FFMPEG_VideoWriter.write_frame = write_frame
+        _patched = True
+
+
+class RenderProfiler:
+    """Collects per-stage call counts and self time for one render."""
+
+    def __init__(self) -> None:
+        self.calls: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self.self_sec: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self.inclusive_sec: Dict[str, float] = defaultdict(float)
+        self.encode_wall_sec = 0.0
+        self._stack: List[str] = []
+        self._child_sec: List[float] = []
+
+    def _call(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self._stack.append(name)
+        self._child_sec.append(0.0)
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            path = tuple(self._stack)
+            self._stack.pop()
+            self.calls[path] += 1
+            self.self_sec[path] += elapsed - self._child_sec.pop()
+            self.inclusive_sec[name] += elapsed
+            if self._child_sec:
+                self._child_sec[-1] += elapsed
+
+    def _timed(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            return self._call(name, fn, *args, **kwargs)
+
+        return timed
+
+    def wrap(self, clip: Any, name: str) -> Any:
+        """Time ``clip``'s frame function (and its mask's) as stage ``name``."""
+        clip.frame_function = self._timed(name, clip.frame_function)
+        if getattr(clip, "mask", None) is not None:
+            clip.mask.frame_function = self._timed(f"{name}.mask", clip.mask.frame_function)
+        return clip
+
+    def wrap_position(self, clip: Any, name: str) -> Any:
+        """Time the clip's position function, which moviepy calls once per frame."""
+        if callable(clip.pos):
+            clip.pos = self._timed(name, clip.pos)
+        return clip
+
+    @contextmanager
+    def encoding(self) -> Iterator[None]:
+        """Time the whole encode and every frame write into the ffmpeg pipe."""
+        _install_write_frame_hook()
+        # Drop frames moviepy sampled while building the clips (e.g. sizing probes).
+        self.calls.clear()
+        self.self_sec.clear()
+        self.inclusive_sec.clear()
+        token = _encoding.set(self)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.encode_wall_sec += time.perf_counter() - started
+            _encoding.reset(token)
+
+    @property
+    def frames(self) -> int:
+        return self.calls.get((_ROOT,), 0)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Per-stage totals, slowest self time first."""
+        calls: Dict[str, int] = defaultdict(int)
+        self_sec: Dict[str, float] = defaultdict(float)
+        for path, count in self.calls.items():
+            calls[path[-1]] += count
+            self_sec[path[-1]] += self.self_sec[path]
+        frames = max(self.frames, 1)
+        rows = [
+            {
+                "stage": name,
+                "calls": calls[name],
+                "calls_per_frame": calls[name] / frames,
+                "self_sec": self_sec[name],
+                "self_ms_per_frame": self_sec[name] * 1000 / frames,
+                "inclusive_sec": self.inclusive_sec[name],
+            }
+            for name in calls
+        ]
+        return sorted(rows, key=lambda row: row["self_sec"], reverse=True)
+
+    def folded(self) -> str:
+        """Collapsed-stack lines (``a;b;c <microseconds>``)."""
+        lines = [
+            f"{';'.join(path)} {int(round(self.self_sec[path] * 1_000_000))}"
+            for path in sorted(self.calls)
+        ]
+        return "\n".join(lines) + "\n"
+
+    def table(self) -> str:
+        composite = self.inclusive_sec.get(_ROOT, 0.0)
+        pipe = self.inclusive_sec.get(_PIPE, 0.0)
+        other = max(self.encode_wall_sec - composite - pipe, 0.0)
+        lines = [
+            f"Render profile: {self.frames} frames, encode wall {self.encode_wall_sec:.2f}s "
+            f"(compositing {composite:.2f}s, pipe write {pipe:.2f}s, other {other:.2f}s)",
+            "",
+            f"{'stage':<34} {'calls':>8} {'calls/frame':>11} {'self s':>9} {'self ms/frame':>13} {'incl s':>9}",
+        ]
+        for row in self.rows():
+            lines.append(
+                f"{row['stage']:<34} {row['calls']:>8} {row['calls_per_frame']:>11.2f} "
+                f"{row['self_sec']:>9.3f} {row['self_ms_per_frame']:>13.3f} {row['inclusive_sec']:>9.3f}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write_reports(self, output_path: str) -> Tuple[str, str]:
+        """Write the table and folded stacks next to ``output_path``."""
+        table_path = f"{output_path}.profile.txt"
+        folded_path = f"{output_path}.profile.folded"
+        with open(table_path, "w", encoding="utf-8") as f:
+            f.write(self.table())
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write(self.folded())
+        return table_path, folded_path
@@ -0,0 +1,207 @@
+"""Worker processes that drain the Duo Mode job queue.
+
+Run with ``python -m backend.render_worker --workers 4``. Each worker claims
+queued jobs from ``database/db.sqlite`` and runs whichever of the
+transcribe -> dialogue -> TTS -> render stages the job payload still needs.
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from backend.job_queue import (
+    HEARTBEAT_INTERVAL_SEC,
+    JobCancelled,
+    JobLost,
+    claim_next_job,
+    finish_job,
+    heartbeat,
+    init_db,
+    update_progress,
+)
+
+_logger = logging.getLogger(__name__)
+_FRAME_PROGRESS_INTERVAL_SEC = 0.5
+
+
+def output_path_for(job: Dict[str, Any]) -> str:
+    """Where ``job``'s video is (or will be) written."""
+    return job["payload"].get("output_path") or os.path.join("temp", "renders", f"{job['id']}.mp4")
+
+
+@contextmanager
+def _heartbeat(job: Dict[str, Any]) -> Iterator[None]:
+    """Keep ``job`` from looking stale while a long stage runs without progress updates."""
+    stop = threading.Event()
+
+    def _beat() -> None:
+        while not stop.wait(HEARTBEAT_INTERVAL_SEC):
+            try:
+                if not heartbeat(job["id"], job["worker"]):
+                    return  # requeued elsewhere; the next _progress raises JobLost
+            except Exception:
+                _logger.exception("Heartbeat for job %s failed", job["id"])
+
+    thread = threading.Thread(target=_beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job: Dict[str, Any], threads: Optional[int] = None, logger: Optional[logging.Logger] = None) -> Dict[str, Any]:
+    """Run the remaining pipeline stages for ``job`` and return its result payload.
+
+    Stages are skipped when the payload already carries their output, so the
+    UI can submit a render-only job while ``batch_cli --queue`` submits full
+    jobs from a topic or an audio path.
+    """
+    active_logger = logger or _logger
+    job_id = job["id"]
+    payload = dict(job["payload"])
+    pause_ms = int(payload.get("pause_ms", 250))
+
+    def _progress(stage: str, progress: float) -> None:
+        # Fenced on the claiming worker, so a requeued job's old worker stops.
+        update_progress(job_id, stage, progress, worker=job.get("worker"))
+
+    if not any(payload.get(key) for key in ("timed_dialogue", "dialogue", "topic", "audio_path")):
+        raise ValueError("Job payload needs one of timed_dialogue, dialogue, topic or audio_path.")
+
+    if not payload.get("topic") and not payload.get("dialogue") and not payload.get("timed_dialogue"):
+        from backend.stt_service import transcribe_audio
+
+        _progress("transcribe", 0.0)
+        payload["topic"] = transcribe_audio(payload["audio_path"], logger=active_logger)
+        _progress("transcribe", 1.0)
+
+    if not payload.get("dialogue") and not payload.get("timed_dialogue"):
+        from backend.ai_service import generate_dialogue
+
+        _progress("dialogue", 0.0)
+        payload["dialogue"] = generate_dialogue(payload["topic"], logger=active_logger)
+        _progress("dialogue", 1.0)
+
+    if not payload.get("timed_dialogue"):
+        from backend.tts_service import synthesize_dialogue
+
+        _progress("tts", 0.0)
+        final_audio, timed_dialogue = synthesize_dialogue(
+            payload["dialogue"],
+            pause_ms=pause_ms,
+            logger=active_logger,
+            on_line=lambda done, total: _progress("tts", done / max(total, 1)),
+        )
+        duo_audio_path = payload.get("duo_audio_path") or os.path.join("temp", "renders", f"{job_id}.mp3")
+        os.makedirs(os.path.dirname(duo_audio_path), exist_ok=True)
+        with open(duo_audio_path, "wb") as f:
+            f.write(final_audio)
+        payload["timed_dialogue"] = timed_dialogue
+        payload["duo_audio_path"] = duo_audio_path
+
+    from backend.shorts_renderer import render_shorts_video
+
+    last_report = 0.0
+
+    def _on_frame(frame: int, total: int) -> None:
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < _FRAME_PROGRESS_INTERVAL_SEC and frame < total:
+            return
+        last_report = now
+        _progress("render", frame / max(total, 1))
+
+    _progress("render", 0.0)
+    output_path = output_path_for(job)
+    render_shorts_video(
+        payload["timed_dialogue"],
+        audio_path=payload["duo_audio_path"],
+        output_path=output_path,
+        bg_video_path=payload["bg_video_path"],
+        progress_callback=_on_frame,
+        threads=threads,
+        fragmented=payload.get("fragmented"),
+    )
+    _progress("render", 1.0)
+
+    return {
+        "topic": payload.get("topic"),
+        "dialogue": payload.get("dialogue"),
+        "timed_dialogue": payload["timed_dialogue"],
+        "duo_audio_path": payload["duo_audio_path"],
+        "output_path": output_path,
+    }
+
+
+def worker_loop(name: str, threads: Optional[int] = None, poll_interval: float = 1.0) -> None:
+    """Claim and run jobs forever."""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+    init_db()
+    _logger.info("Worker %s started (pid=%s)", name, os.getpid())
+    while True:
+        job = claim_next_job(name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        _logger.info("Worker %s picked up job %s", name, job["id"])
+        try:
+            with _heartbeat(job):
+                result = run_job(job, threads=threads)
+        except JobLost:
+            _logger.warning("Job %s was requeued and claimed elsewhere; dropping it", job["id"])
+        except JobCancelled:
+            _logger.info("Job %s cancelled", job["id"])
+            finish_job(job["id"], "cancelled", worker=name)
+        except Exception as exc:
+            _logger.exception("Job %s failed", job["id"])
+            finish_job(job["id"], "failed", error=str(exc), worker=name)
+        else:
+            if not finish_job(job["id"], "done", result=result, worker=name):
+                _logger.warning("Job %s was requeued and claimed elsewhere; result discarded", job["id"])
+
+
+def main() -> None:
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Run Duo Mode render workers.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("RENDER_WORKERS", cpu_count)))
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    workers = max(args.workers, 1)
+    # Split the cores between concurrent x264 encodes instead of oversubscribing.
+    threads = max(1, cpu_count // workers)
+    init_db()
+    ctx = multiprocessing.get_context("spawn")
+    host = socket.gethostname()
+    processes = [
+        ctx.Process(
+            target=worker_loop,
+            # The pid keeps names unique across launches on one host, which
+            # the worker fencing in update_progress/finish_job relies on.
+            args=(f"{host}-{os.getpid()}-{idx}", threads, args.poll_interval),
+            daemon=True,
+        )
+        for idx in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
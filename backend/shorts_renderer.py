@@ -2,13 +2,27 @@
 
 from __future__ import annotations
 
+from contextlib import nullcontext
 import os
 import random
 import re
+from typing import Callable
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+from backend.fragmented_mp4 import FRAGMENT_MOVFLAGS, FragmentPublisher
+from backend.render_profiler import RenderProfiler
+from backend.tracing import span
+
+_FPS = 30
+# Keyframe (and so fragment) spacing for fragmented output.
+_FRAGMENT_SEC = float(os.getenv("RENDER_FRAGMENT_SEC", "2"))
+
+
+def _profiled(profiler: RenderProfiler | None, clip, name: str):
+    return profiler.wrap(clip, name) if profiler is not None else clip
+
 
 def five_word_caption_clips(
     text: str,
@@ -25,6 +39,7 @@ def five_word_caption_clips(
     stroke_width: int = 3,
     min_chunk_sec: float = 0.18,
     overlap_sec: float = 0.05,
+    profiler: RenderProfiler | None = None,
 ) -> list:
     if not text or not text.strip():
         return []
@@ -64,12 +79,16 @@ def five_word_caption_clips(
             font_size=font_size,
             stroke_width=stroke_width,
         )
+        caption = _profiled(profiler, caption, "caption.image")
         caption = with_bounce_in(
             caption,
             bounce_from=0.95,
             bounce_to=1.0,
             bounce_sec=0.08,
         )
+        caption = _profiled(profiler, caption, "caption.bounce_resize")
+        if profiler is not None:
+            profiler.wrap_position(caption, "caption.position")
         clips.append(caption)
     return clips
 
@@ -292,12 +311,38 @@ def with_character_transition(
     return img_clip.with_position(lambda t: pos_at(t))
 
 
-def render_shorts_video(
+def _frame_progress_logger(progress_callback: Callable[[int, int], None]):
+    """Proglog logger forwarding moviepy's frame counter to ``progress_callback``.
+
+    Exceptions raised by the callback abort ``write_videofile`` mid-encode,
+    which is how a cancelled render job stops its compute.
+    """
+    from proglog import ProgressBarLogger
+
+    class _FrameProgressLogger(ProgressBarLogger):
+        def bars_callback(self, bar, attr, value, old_value=None):
+            if bar == "frame_index" and attr == "index":
+                # proglog sets index=i as frame i starts and index=total once the
+                # loop ends, so ``value`` already counts finished frames.
+                total = int(self.bars[bar]["total"] or 0)
+                progress_callback(min(int(value), total) if total else int(value), total)
+
+    return _FrameProgressLogger()
+
+
+def build_shorts_composite(
     timed_dialogue: list[dict[str, object]],
     audio_path: str = "temp/duo_audio.mp3",
-    output_path: str = "temp/output_short.mp4",
     bg_video_path: str = "temp/brainRotVideos/default.mp4",
-) -> str:
+    *,
+    john_path: str = os.path.join("temp", "john_character_cutout.png"),
+    dad_path: str = os.path.join("temp", "cartoon_dad_transparent.png"),
+    profiler: RenderProfiler | None = None,
+):
+    """Assemble the background, character and caption layers into one clip.
+
+    With a ``profiler`` every layer stage is wrapped for per-frame timing.
+    """
     from moviepy import (
         AudioFileClip,
         CompositeVideoClip,
@@ -306,14 +351,11 @@ def render_shorts_video(
         vfx,
     )
 
-    john_path = os.path.join("temp", "john_character_cutout.png")
-    dad_path = os.path.join("temp", "cartoon_dad_transparent.png")
-
     width, height = 1080, 1920
     audio_clip = AudioFileClip(audio_path)
     audio_duration = audio_clip.duration
 
-    background = VideoFileClip(bg_video_path)
+    background = _profiled(profiler, VideoFileClip(bg_video_path), "background.decode")
     if background.duration <= audio_duration:
         background = background.with_effects([vfx.Loop(duration=audio_duration)])
         start_t = 0.0
@@ -321,13 +363,14 @@ def render_shorts_video(
         start_t = random.uniform(0, background.duration - audio_duration)
     background = background.subclipped(start_t, start_t + audio_duration)
     scale = max(width / background.w, height / background.h)
-    background = background.resized(scale)
+    background = _profiled(profiler, background.resized(scale), "background.resize")
     background = background.cropped(
         x_center=background.w / 2,
         y_center=background.h / 2,
         width=width,
         height=height,
     )
+    background = _profiled(profiler, background, "background.crop")
 
     overlays: list[object] = []
     for entry in timed_dialogue:
@@ -337,7 +380,7 @@ def render_shorts_video(
         line_duration = float(entry["duration"])
         img_path = john_path if speaker == "JOHN" else dad_path
 
-        img_clip = ImageClip(img_path).resized(width=int(width * 0.5))
+        img_clip = _profiled(profiler, ImageClip(img_path).resized(width=int(width * 0.5)), "character.image")
         img_clip = img_clip.with_start(start).with_duration(line_duration)
         img_y = height - img_clip.h - int(height * 0.05)
         if speaker == "CARTOON_DAD":
@@ -353,6 +396,8 @@ def render_shorts_video(
             transition="slide",
             trans_sec=0.12,
         )
+        if profiler is not None:
+            profiler.wrap_position(img_clip, "character.position")
 
         text_y = max(int(height * 0.05), img_y - int(height * 0.40))
         caption_clips = five_word_caption_clips(
@@ -367,6 +412,7 @@ def render_shorts_video(
             font="Menlo",
             y_pos=text_y,
             stroke_width=6,
+            profiler=profiler,
         )
 
         overlays.append(img_clip)
@@ -375,12 +421,76 @@ def render_shorts_video(
     # Future features: active speaker glow, karaoke word timing, toy example cards.
     composite = CompositeVideoClip([background] + overlays, size=(width, height))
     composite = composite.with_duration(audio_duration).with_audio(audio_clip)
+    return _profiled(profiler, composite, "composite")
+
+
+def render_shorts_video(
+    timed_dialogue: list[dict[str, object]],
+    audio_path: str = "temp/duo_audio.mp3",
+    output_path: str = "temp/output_short.mp4",
+    bg_video_path: str = "temp/brainRotVideos/default.mp4",
+    *,
+    progress_callback: Callable[[int, int], None] | None = None,
+    threads: int | None = None,
+    profile: bool | None = None,
+    fragmented: bool | None = None,
+    john_path: str = os.path.join("temp", "john_character_cutout.png"),
+    dad_path: str = os.path.join("temp", "cartoon_dad_transparent.png"),
+) -> str:
+    """Render the Short to ``output_path``.
+
+    ``profile`` (default: ``RENDER_PROFILE=1``) times every layer per frame and
+    writes ``<output>.profile.txt`` / ``.profile.folded`` next to the video.
+    ``fragmented`` (default: ``RENDER_FRAGMENTED=1``) writes a fragmented MP4
+    with a keyframe every ``RENDER_FRAGMENT_SEC``. Finished fragments are
+    published as they land, so the file can be played while it encodes.
+    """
+    if profile is None:
+        profile = os.getenv("RENDER_PROFILE") == "1"
+    if fragmented is None:
+        fragmented = os.getenv("RENDER_FRAGMENTED") == "1"
+    profiler = RenderProfiler() if profile else None
+    with span("render.build", bg_video=os.path.basename(bg_video_path)) as s:
+        composite = build_shorts_composite(
+            timed_dialogue,
+            audio_path,
+            bg_video_path,
+            john_path=john_path,
+            dad_path=dad_path,
+            profiler=profiler,
+        )
+        s.set(lines=len(timed_dialogue), duration_sec=composite.duration)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    composite.write_videofile(
-        output_path,
-        codec="libx264",
-        audio_codec="aac",
-        fps=30,
-    )
+    ffmpeg_params = None
+    if fragmented:
+        keyint = str(max(1, round(_FPS * _FRAGMENT_SEC)))
+        ffmpeg_params = ["-movflags", FRAGMENT_MOVFLAGS, "-g", keyint, "-keyint_min", keyint, "-sc_threshold", "0"]
+    with span("render.encode", fps=_FPS, threads=threads, fragmented=fragmented) as s:
+        # ffmpeg runs as a child process, so its CPU shows up in children times.
+        children_before = os.times()
+        with FragmentPublisher(output_path, _FRAGMENT_SEC) if fragmented else nullcontext():
+            with profiler.encoding() if profiler is not None else nullcontext():
+                composite.write_videofile(
+                    output_path,
+                    codec="libx264",
+                    audio_codec="aac",
+                    fps=_FPS,
+                    threads=threads,
+                    ffmpeg_params=ffmpeg_params,
+                    # moviepy names its temp audio after the output basename in
+                    # the cwd; keep it next to the output so concurrent renders
+                    # of same-named files in different dirs don't share it.
+                    temp_audiofile_path=os.path.dirname(os.path.abspath(output_path)),
+                    logger=_frame_progress_logger(progress_callback) if progress_callback else "bar",
+                )
+        children_after = os.times()
+        s.set(
+            bytes_out=os.path.getsize(output_path),
+            ffmpeg_cpu_sec=(children_after.children_user + children_after.children_system)
+            - (children_before.children_user + children_before.children_system),
+        )
+        if profiler is not None:
+            table_path, _ = profiler.write_reports(output_path)
+            s.set(profile_report=table_path, profile_frames=profiler.frames)
     return output_path
@@ -1,11 +1,17 @@
 """Speech-to-text powered by local Whisper small model."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import logging
 import os
+import threading
 from typing import Optional
 
 from dotenv import load_dotenv
 import torch
 
+from backend.tracing import span
+
 try:
     import whisper
 except ImportError as exc:  # pragma: no cover - fail fast for missing dependency
@@ -30,7 +36,27 @@ def _select_device() -> str:
 
 _MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
 _DEVICE = _select_device()
-_model = whisper.load_model(_MODEL_NAME, device=_DEVICE)
+# Async transcriptions share one Whisper model; a single-thread executor keeps
+# them from oversubscribing the CPU/GPU it runs on.
+_async_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+
+_model_lock = threading.Lock()
+# Whisper's decoder installs kv-cache hooks on the shared model for the length
+# of a transcribe() call, so concurrent calls corrupt each other's output.
+_transcribe_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_model_once():
+    return whisper.load_model(_MODEL_NAME, device=_DEVICE)
+
+
+def _load_model():
+    """Load Whisper once per process; every Streamlit session shares it."""
+    # lru_cache does not stop two concurrent first calls from both loading.
+    with _model_lock:
+        return _load_model_once()
 
 
 def transcribe_audio(audio_path: str, logger: Optional[logging.Logger] = None) -> str:
@@ -38,8 +64,19 @@ def transcribe_audio(audio_path: str, logger: Optional[logging.Logger] = None) -
     active_logger = logger or logging.getLogger(__name__)
     active_logger.info("Starting transcription for %s", audio_path)
 
-    result = _model.transcribe(audio_path)
-    text = result["text"].strip()
+    bytes_in = os.path.getsize(audio_path) if os.path.exists(audio_path) else 0
+    with span("stt.transcribe", model=_MODEL_NAME, device=_DEVICE, bytes_in=bytes_in) as s:
+        model = _load_model()
+        with _transcribe_lock:
+            result = model.transcribe(audio_path)
+        text = result["text"].strip()
+        s.set(bytes_out=len(text))
 
     active_logger.info("Transcription complete: %s", text)
     return text
+
+
+async def transcribe_audio_async(audio_path: str, logger: Optional[logging.Logger] = None) -> str:
+    """Run ``transcribe_audio`` off the event loop on the Whisper executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_async_executor, transcribe_audio, audio_path, logger)
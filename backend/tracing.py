@@ -0,0 +1,296 @@
+"""Lightweight timing spans and metrics for the Duo Mode pipeline.
+
+Wrap a stage with ``span`` (or ``traced``) to record wall time, CPU time,
+growth of the process's peak RSS, bytes in/out and cache hits::
+
+    with span("tts.stitch", bytes_in=total) as s:
+        audio = ...
+        s.set(bytes_out=len(audio))
+
+Finished spans are appended as JSON lines to ``TRACE_PATH`` (default
+``logs/trace.jsonl``) and folded into per-stage totals that can be read as
+Prometheus text via ``prometheus_text()``, written to ``METRICS_PATH``, or
+served on ``METRICS_PORT``. Totals are per process (render workers and pool
+children each keep their own), so every series carries a ``pid`` label,
+each process writes its own ``<METRICS_PATH stem>.<pid><ext>`` file, and a
+process that finds ``METRICS_PORT`` taken binds the next free port.
+
+CPU time is per thread, so it is left out (``cpu_sec`` is None) for spans
+opened on a running event loop, where it would include other tasks' work.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+import uuid
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows has no resource module
+    resource = None
+
+T = TypeVar("T")
+
+_TRACE_PATH = os.getenv("TRACE_PATH", os.path.join("logs", "trace.jsonl"))
+_METRICS_PATH = os.getenv("METRICS_PATH")
+_METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+_METRICS_PORT_SPAN = int(os.getenv("METRICS_PORT_SPAN", "32"))
+_logger = logging.getLogger(__name__)
+_ENABLED = os.getenv("TRACE_ENABLED", "1") != "0"
+
+_current: ContextVar[Optional["Span"]] = ContextVar("duo_span", default=None)
+_write_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, float]] = {}
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_counter_sources: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class Span:
+    """One timed unit of work; attributes set on it land in the JSONL record."""
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = dict(attrs)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def mark_cache_miss() -> None:
+    """Call inside a memoized function body: the enclosing span was not a cache hit."""
+    active = _current.get()
+    if active is not None:
+        active.set(cache_hit=False)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time the enclosed block as span ``name`` (nested spans share a trace id)."""
+    parent = _current.get()
+    active = Span(name, parent, attrs)
+    if not _ENABLED:
+        yield active
+        return
+    token = _current.set(active)
+    wall_start = time.perf_counter()
+    cpu_start = None if _on_event_loop() else time.thread_time()
+    rss_start = _peak_rss_mb()
+    started_at = time.time()
+    error: Optional[str] = None
+    try:
+        yield active
+    except BaseException as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _current.reset(token)
+        rss_end = _peak_rss_mb()
+        record = {
+            "trace_id": active.trace_id,
+            "span_id": active.span_id,
+            "parent_id": active.parent_id,
+            "name": name,
+            "start": started_at,
+            "wall_sec": time.perf_counter() - wall_start,
+            "cpu_sec": time.thread_time() - cpu_start if cpu_start is not None else None,
+            # ru_maxrss only grows, so this is how far the span pushed the
+            # process high-water mark, not the span's own footprint.
+            "peak_rss_growth_mb": rss_end - rss_start if rss_end is not None and rss_start is not None else None,
+            "process_peak_rss_mb": rss_end,
+            "pid": os.getpid(),
+            "error": error,
+            **active.attrs,
+        }
+        _emit(record)
+        if parent is None and _METRICS_PATH:
+            write_prometheus(process_metrics_path(_METRICS_PATH))
+
+
+def traced(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator form of ``span`` for whole functions."""
+
+    def decorator(fn: Callable[..., T]) -> Callable[..., T]:
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _emit(record: Dict[str, Any]) -> None:
+    _accumulate(record)
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        os.makedirs(os.path.dirname(_TRACE_PATH) or ".", exist_ok=True)
+        with open(_TRACE_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _accumulate(record: Dict[str, Any]) -> None:
+    with _metrics_lock:
+        totals = _metrics.setdefault(
+            record["name"],
+            {
+                "count": 0,
+                "errors": 0,
+                "wall_seconds": 0.0,
+                "cpu_seconds": 0.0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "cache_hits": 0,
+                "max_wall_seconds": 0.0,
+            },
+        )
+        totals["count"] += 1
+        totals["errors"] += 1 if record.get("error") else 0
+        totals["wall_seconds"] += record["wall_sec"]
+        totals["cpu_seconds"] += record["cpu_sec"] or 0.0
+        totals["bytes_in"] += int(record.get("bytes_in") or 0)
+        totals["bytes_out"] += int(record.get("bytes_out") or 0)
+        totals["cache_hits"] += 1 if record.get("cache_hit") else 0
+        totals["max_wall_seconds"] = max(totals["max_wall_seconds"], record["wall_sec"])
+
+
+def register_counters(name: str, snapshot: Callable[[], Dict[str, int]]) -> None:
+    """Export ``snapshot()``'s counters as ``duo_<name>_<key>_total`` in ``prometheus_text``."""
+    with _metrics_lock:
+        _counter_sources[name] = snapshot
+
+
+def metrics_snapshot() -> Dict[str, Dict[str, float]]:
+    with _metrics_lock:
+        return {name: dict(values) for name, values in _metrics.items()}
+
+
+def prometheus_text() -> str:
+    """Render per-stage totals in the Prometheus text exposition format."""
+    snapshot = metrics_snapshot()
+    pid = os.getpid()
+    lines = []
+    for metric, kind in (
+        ("count", "counter"),
+        ("errors", "counter"),
+        ("wall_seconds", "counter"),
+        ("cpu_seconds", "counter"),
+        ("bytes_in", "counter"),
+        ("bytes_out", "counter"),
+        ("cache_hits", "counter"),
+        ("max_wall_seconds", "gauge"),
+    ):
+        full_name = f"duo_span_{metric}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for name, values in sorted(snapshot.items()):
+            lines.append(f'{full_name}{{span="{name}",pid="{pid}"}} {values[metric]}')
+    with _metrics_lock:
+        sources = dict(_counter_sources)
+    for source, snapshot_fn in sorted(sources.items()):
+        for key, value in sorted(snapshot_fn().items()):
+            full_name = f"duo_{source}_{key}_total"
+            lines.append(f"# TYPE {full_name} counter")
+            lines.append(f'{full_name}{{pid="{pid}"}} {value}')
+    peak = _peak_rss_mb()
+    if peak is not None:
+        lines.append("# TYPE duo_process_peak_rss_mb gauge")
+        lines.append(f'duo_process_peak_rss_mb{{pid="{pid}"}} {peak:.1f}')
+    return "\n".join(lines) + "\n"
+
+
+def process_metrics_path(path: str) -> str:
+    """``logs/metrics.prom`` -> ``logs/metrics.<pid>.prom``, one file per process."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{os.getpid()}{ext}"
+
+
+def write_prometheus(path: str) -> None:
+    """Write ``prometheus_text()`` atomically (suitable for node_exporter's textfile collector)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def start_metrics_server(port: int, host: Optional[str] = None) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread; repeated calls reuse the server."""
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def do_GET(self) -> None:
+            if not self.path.startswith("/metrics"):
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    _metrics_server = ThreadingHTTPServer((host or _METRICS_HOST, port), _MetricsHandler)
+    _metrics_server.daemon_threads = True
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    return _metrics_server
+
+
+def _start_metrics_server_in_range(base_port: int) -> None:
+    # Sibling processes (render workers, pool children) each need their own
+    # port, so walk up from METRICS_PORT until one binds.
+    for port in range(base_port, base_port + max(_METRICS_PORT_SPAN, 1)):
+        try:
+            start_metrics_server(port)
+        except OSError:
+            continue
+        if port != base_port:
+            _logger.warning("METRICS_PORT %s is taken; pid %s serves /metrics on %s", base_port, os.getpid(), port)
+        return
+    _logger.warning(
+        "No free metrics port in %s-%s; pid %s is not serving /metrics",
+        base_port, base_port + _METRICS_PORT_SPAN - 1, os.getpid(),
+    )
+
+
+if os.getenv("METRICS_PORT"):
+    _start_metrics_server_in_range(int(os.environ["METRICS_PORT"]))
@@ -0,0 +1,120 @@
+"""Compare ElevenLabs and local Coqui TTS throughput using recorded fixtures.
+
+Record fixtures once (needs ElevenLabs credentials)::
+
+    python -m backend.tts_benchmark record dialogue.json --fixtures temp/tts_fixtures
+
+where ``dialogue.json`` is a list of ``{"speaker": ..., "line": ...}``. Each
+line's mp3 and its measured request latency are saved. Then compare offline::
+
+    python -m backend.tts_benchmark compare --fixtures temp/tts_fixtures --repeat 3
+
+The ElevenLabs path is replayed from the recorded latencies, one line after
+another as ``synthesize_dialogue`` does it; the Coqui path synthesizes the
+same lines on the warm worker pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+from io import BytesIO
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+from pydub import AudioSegment
+
+_logger = logging.getLogger(__name__)
+
+
+def _audio_seconds(mp3_bytes: bytes) -> float:
+    return float(AudioSegment.from_file(BytesIO(mp3_bytes), format="mp3").duration_seconds)
+
+
+def _load_fixture(fixtures_dir: str) -> List[Dict[str, Any]]:
+    with open(os.path.join(fixtures_dir, "fixture.json"), "r", encoding="utf-8") as f:
+        return json.load(f)["lines"]
+
+
+def record(dialogue_path: str, fixtures_dir: str) -> None:
+    from backend.tts_engines import get_engine
+
+    engine = get_engine("elevenlabs")
+    with open(dialogue_path, "r", encoding="utf-8") as f:
+        dialogue = json.load(f)
+    os.makedirs(fixtures_dir, exist_ok=True)
+    lines = []
+    for idx, turn in enumerate(dialogue):
+        voice_id = engine.voice_id_for(turn["speaker"])
+        started = time.perf_counter()
+        audio = engine.speak(turn["line"], voice_id, _logger)
+        latency = time.perf_counter() - started
+        file_name = f"line_{idx:03d}.mp3"
+        with open(os.path.join(fixtures_dir, file_name), "wb") as f:
+            f.write(audio)
+        lines.append({"speaker": turn["speaker"], "text": turn["line"], "file": file_name, "latency_sec": latency})
+        print(f"Recorded line {idx} ({latency:.2f}s)")
+    with open(os.path.join(fixtures_dir, "fixture.json"), "w", encoding="utf-8") as f:
+        json.dump({"lines": lines}, f, indent=2)
+
+
+def _summary(name: str, wall_sec: float, lines: int, chars: int, audio_sec: float) -> Dict[str, Any]:
+    return {
+        "engine": name,
+        "wall_sec": round(wall_sec, 3),
+        "lines_per_sec": round(lines / wall_sec, 3) if wall_sec else None,
+        "chars_per_sec": round(chars / wall_sec, 1) if wall_sec else None,
+        "realtime_factor": round(audio_sec / wall_sec, 2) if wall_sec else None,
+    }
+
+
+def compare(fixtures_dir: str, repeat: int = 1) -> List[Dict[str, Any]]:
+    fixture = _load_fixture(fixtures_dir) * max(repeat, 1)
+    chars = sum(len(line["text"]) for line in fixture)
+
+    recorded_audio_sec = 0.0
+    started = time.perf_counter()
+    for line in fixture:
+        time.sleep(line["latency_sec"])
+        with open(os.path.join(fixtures_dir, line["file"]), "rb") as f:
+            recorded_audio_sec += _audio_seconds(f.read())
+    results = [_summary("elevenlabs (replayed)", time.perf_counter() - started, len(fixture), chars, recorded_audio_sec)]
+
+    from backend.tts_coqui import CoquiEngine
+
+    engine = CoquiEngine()
+    warm_started = time.perf_counter()
+    engine.warm_up()
+    warm_sec = time.perf_counter() - warm_started
+    lines = [(line["text"], engine.voice_id_for(line["speaker"])) for line in fixture]
+    started = time.perf_counter()
+    coqui_audio_sec = sum(_audio_seconds(chunk) for chunk in engine.speak_many(lines, _logger))
+    coqui = _summary(f"coqui ({engine.workers} workers)", time.perf_counter() - started, len(fixture), chars, coqui_audio_sec)
+    coqui["warm_up_sec"] = round(warm_sec, 2)
+    results.append(coqui)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TTS engine throughput comparison.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    record_parser = sub.add_parser("record", help="Record ElevenLabs fixtures")
+    record_parser.add_argument("dialogue", help="JSON list of {speaker, line}")
+    record_parser.add_argument("--fixtures", default=os.path.join("temp", "tts_fixtures"))
+    compare_parser = sub.add_parser("compare", help="Replay fixtures vs local Coqui")
+    compare_parser.add_argument("--fixtures", default=os.path.join("temp", "tts_fixtures"))
+    compare_parser.add_argument("--repeat", type=int, default=1, help="Repeat the fixture lines N times")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
+    if args.command == "record":
+        record(args.dialogue, args.fixtures)
+        return
+    for row in compare(args.fixtures, repeat=args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
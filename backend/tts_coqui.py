@@ -0,0 +1,132 @@
+"""Local text-to-speech with Coqui TTS on a pool of warm worker processes.
+
+Each worker loads the model once (in the pool initializer) and then serves
+lines until shutdown, so only the first call pays the model load. Lines are
+fanned out across workers one task per line, which keeps the pool balanced
+when line lengths differ a lot.
+
+Daemonic processes (the render workers) may not start children, so there the
+model is loaded in-process and lines are synthesized on a single thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+import logging
+import multiprocessing
+import os
+from typing import Iterator, Sequence
+
+from dotenv import load_dotenv
+
+from backend.tts_engines import TTSEngine
+
+load_dotenv()
+
+_MODEL_NAME = os.getenv("COQUI_MODEL", "tts_models/en/vctk/vits")
+_SPEAKER_JOHN = os.getenv("COQUI_SPEAKER_JOHN", "p226")
+_SPEAKER_CARTOON_DAD = os.getenv("COQUI_SPEAKER_CARTOON_DAD", "p232")
+_DEFAULT_SPEAKER = os.getenv("COQUI_SPEAKER_DEFAULT", _SPEAKER_JOHN)
+_WORKERS = int(os.getenv("COQUI_WORKERS", "0") or 0) or max(1, (os.cpu_count() or 2) // 2)
+_DEVICE = os.getenv("COQUI_DEVICE", "cpu")
+
+# Populated inside each worker process by ``_init_worker``.
+_worker_tts = None
+
+
+def _init_worker(model_name: str, device: str, torch_threads: int = 1) -> None:
+    global _worker_tts
+    import torch
+    from TTS.api import TTS
+
+    # Workers split the cores between them; one intra-op thread each avoids
+    # every worker spawning a full-size torch thread pool.
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    _worker_tts = TTS(model_name).to(device)
+
+
+def _synthesize(text: str, speaker: str) -> bytes:
+    import numpy as np
+    from pydub import AudioSegment
+
+    assert _worker_tts is not None, "Coqui worker used before initialization"
+    kwargs = {"speaker": speaker} if _worker_tts.is_multi_speaker else {}
+    wav = np.asarray(_worker_tts.tts(text=text, **kwargs), dtype=np.float32)
+    pcm = (np.clip(wav, -1.0, 1.0) * 32767).astype(np.int16)
+    segment = AudioSegment(
+        pcm.tobytes(),
+        frame_rate=_worker_tts.synthesizer.output_sample_rate,
+        sample_width=2,
+        channels=1,
+    )
+    buffer = BytesIO()
+    segment.export(buffer, format="mp3")
+    return buffer.getvalue()
+
+
+def _ping() -> bool:
+    return _worker_tts is not None
+
+
+class CoquiEngine(TTSEngine):
+    name = "coqui"
+
+    def __init__(self, workers: int = _WORKERS, model_name: str = _MODEL_NAME, device: str = _DEVICE) -> None:
+        self.model_name = model_name
+        self._pool: Executor
+        if multiprocessing.current_process().daemon:
+            # The thread shares this process's torch, so leave its thread count alone.
+            self.workers = 1
+            self._pool = ThreadPoolExecutor(
+                max_workers=1,
+                initializer=_init_worker,
+                initargs=(model_name, device, 0),
+            )
+        else:
+            self.workers = max(workers, 1)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, device),
+            )
+
+    def warm_up(self) -> None:
+        """Start every worker and wait for its model to load."""
+        for future in [self._pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def voice_id_for(self, speaker: str) -> str:
+        """Return the Coqui speaker id configured for a Duo Mode speaker."""
+        speaker_key = speaker.strip().upper()
+        if speaker_key == "JOHN":
+            return _SPEAKER_JOHN
+        if speaker_key == "CARTOON_DAD":
+            return _SPEAKER_CARTOON_DAD
+        return _DEFAULT_SPEAKER
+
+    def speak(self, text: str, voice_id: str, logger: logging.Logger) -> bytes:
+        try:
+            return self._pool.submit(_synthesize, text, voice_id).result()
+        except Exception as exc:
+            logger.error("Coqui text-to-speech failed: %s", exc)
+            raise RuntimeError(f"Coqui text-to-speech failed: {exc}") from exc
+
+    def speak_many(self, lines: Sequence[tuple[str, str]], logger: logging.Logger) -> Iterator[bytes]:
+        futures = [self._pool.submit(_synthesize, text, voice_id) for text, voice_id in lines]
+        for future in futures:
+            try:
+                yield future.result()
+            except Exception as exc:
+                logger.error("Coqui text-to-speech failed: %s", exc)
+                raise RuntimeError(f"Coqui text-to-speech failed: {exc}") from exc
+
+    async def speak_async(self, text: str, voice_id: str, logger: logging.Logger) -> bytes:
+        try:
+            return await asyncio.wrap_future(self._pool.submit(_synthesize, text, voice_id))
+        except Exception as exc:
+            logger.error("Coqui text-to-speech failed: %s", exc)
+            raise RuntimeError(f"Coqui text-to-speech failed: {exc}") from exc
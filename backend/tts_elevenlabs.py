@@ -0,0 +1,107 @@
+"""Text-to-speech via the ElevenLabs API."""
+
+from __future__ import annotations
+
+import inspect
+import logging
+import os
+
+from dotenv import load_dotenv
+from elevenlabs import AsyncElevenLabs, ElevenLabs
+
+from backend.api_clients import LoopLocal, build_async_http_client, build_http_client, policy_for
+from backend.tts_engines import TTSEngine
+
+load_dotenv()
+
+_DEFAULT_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
+_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_multilingual_v2")
+_OUTPUT_FORMAT = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_44100_128")
+_VOICE_ID_CARTOON_DAD = os.getenv("VOICE_ID_CARTOON_DAD")
+_VOICE_ID_JOHN = os.getenv("VOICE_ID_JOHN")
+_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io")
+# Retries are handled by the shared policy, not the SDK. Generation bills per
+# character, so calls are marked non-idempotent: only outright rejections
+# (429) are retried, never a 5xx or dropped connection that may have billed.
+_REQUEST_OPTIONS = {"max_retries": 0}
+
+
+class ElevenLabsEngine(TTSEngine):
+    name = "elevenlabs"
+
+    def __init__(self) -> None:
+        api_key = os.getenv("ELEVENLABS_API_KEY")
+        if not api_key:
+            raise RuntimeError("Missing ELEVENLABS_API_KEY in environment/.env file.")
+        self._client = ElevenLabs(
+            api_key=api_key, base_url=_BASE_URL, httpx_client=build_http_client("ELEVENLABS")
+        )
+        # httpx async pools are tied to one event loop, so build one client per loop.
+        self._async_client = LoopLocal(
+            lambda: AsyncElevenLabs(
+                api_key=api_key, base_url=_BASE_URL, httpx_client=build_async_http_client("ELEVENLABS")
+            )
+        )
+        self._policy = policy_for("ELEVENLABS")
+
+    def voice_id_for(self, speaker: str) -> str:
+        """Return the configured ElevenLabs voice ID for a Duo Mode speaker."""
+        speaker_key = speaker.strip().upper()
+        if speaker_key == "JOHN":
+            voice_id = _VOICE_ID_JOHN
+        elif speaker_key == "CARTOON_DAD":
+            voice_id = _VOICE_ID_CARTOON_DAD
+        else:
+            voice_id = None
+
+        if not voice_id:
+            voice_id = _DEFAULT_VOICE_ID
+        if not voice_id:
+            raise RuntimeError(
+                "Missing ElevenLabs voice mapping. "
+                "Set VOICE_ID_JOHN and VOICE_ID_CARTOON_DAD (or ELEVENLABS_VOICE_ID as fallback)."
+            )
+        return voice_id
+
+    def speak(self, text: str, voice_id: str, logger: logging.Logger) -> bytes:
+        # The response body streams lazily, so the join sits inside the
+        # policy call and mid-stream failures are seen (and counted) by it.
+        try:
+            return self._policy.call(
+                lambda: b"".join(
+                    self._client.text_to_speech.convert(
+                        voice_id=voice_id,
+                        model_id=_MODEL_ID,
+                        text=text,
+                        output_format=_OUTPUT_FORMAT,
+                        optimize_streaming_latency="0",
+                        request_options=_REQUEST_OPTIONS,
+                    )
+                ),
+                idempotent=False,
+            )
+        except Exception as exc:  # pragma: no cover - depends on external API
+            logger.error("ElevenLabs text-to-speech failed: %s", exc)
+            raise RuntimeError(f"ElevenLabs text-to-speech failed: {exc}") from exc
+
+    async def speak_async(self, text: str, voice_id: str, logger: logging.Logger) -> bytes:
+        client = self._async_client.get()
+
+        async def _convert() -> bytes:
+            stream = client.text_to_speech.convert(
+                voice_id=voice_id,
+                model_id=_MODEL_ID,
+                text=text,
+                output_format=_OUTPUT_FORMAT,
+                optimize_streaming_latency="0",
+                request_options=_REQUEST_OPTIONS,
+            )
+            if inspect.isawaitable(stream):
+                stream = await stream
+            return b"".join([chunk async for chunk in stream])
+
+        try:
+            return await self._policy.acall(_convert, idempotent=False)
+        except Exception as exc:  # pragma: no cover - depends on external API
+            logger.error("ElevenLabs text-to-speech failed: %s", exc)
+            raise RuntimeError(f"ElevenLabs text-to-speech failed: {exc}") from exc
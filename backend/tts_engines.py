@@ -0,0 +1,53 @@
+"""Pluggable text-to-speech engines behind ``backend.tts_service``.
+
+Select one with ``TTS_ENGINE`` (``elevenlabs`` by default, or ``coqui`` for
+local synthesis). Every engine returns mp3 bytes so stitching, timing and
+rendering stay engine-agnostic.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from functools import lru_cache
+import logging
+import os
+from typing import Iterator, Optional, Sequence
+
+
+class TTSEngine(ABC):
+    """Base engine; subclasses implement ``voice_id_for`` and ``speak``."""
+
+    name = "base"
+
+    @abstractmethod
+    def voice_id_for(self, speaker: str) -> str:
+        """Return the engine's voice id for a Duo Mode speaker."""
+
+    @abstractmethod
+    def speak(self, text: str, voice_id: str, logger: logging.Logger) -> bytes:
+        """Synthesize ``text`` and return mp3 bytes."""
+
+    def speak_many(self, lines: Sequence[tuple[str, str]], logger: logging.Logger) -> Iterator[bytes]:
+        """Yield mp3 bytes for each ``(text, voice_id)`` in input order."""
+        for text, voice_id in lines:
+            yield self.speak(text, voice_id, logger)
+
+    async def speak_async(self, text: str, voice_id: str, logger: logging.Logger) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.speak, text, voice_id, logger)
+
+
+@lru_cache(maxsize=None)
+def get_engine(name: Optional[str] = None) -> TTSEngine:
+    """Return the process-wide engine named by ``name`` or ``TTS_ENGINE``."""
+    engine_name = (name or os.getenv("TTS_ENGINE", "elevenlabs")).strip().lower()
+    if engine_name == "elevenlabs":
+        from backend.tts_elevenlabs import ElevenLabsEngine
+
+        return ElevenLabsEngine()
+    if engine_name == "coqui":
+        from backend.tts_coqui import CoquiEngine
+
+        return CoquiEngine()
+    raise RuntimeError(f"Unknown TTS_ENGINE '{engine_name}'. Use 'elevenlabs' or 'coqui'.")
@@ -1,77 +1,67 @@
-"""Text-to-speech via the ElevenLabs API."""
+"""Text-to-speech for Duo Mode: engine dispatch plus mp3 stitching/timing.
+
+Speech comes from the engine selected by ``TTS_ENGINE`` (see
+``backend/tts_engines.py``); ElevenLabs is the default.
+"""
 
 from __future__ import annotations
 
+import asyncio
 from io import BytesIO
 import logging
-import os
-from typing import Optional, Sequence
+import time
+from typing import Callable, Iterator, Optional, Sequence
 
 from dotenv import load_dotenv
-from elevenlabs import ElevenLabs
 from pydub import AudioSegment
 import streamlit as st
 
-load_dotenv()
-
-_API_KEY = os.getenv("ELEVENLABS_API_KEY")
-if not _API_KEY:
-    raise RuntimeError("Missing ELEVENLABS_API_KEY in environment/.env file.")
-
-_DEFAULT_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID")
-_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_multilingual_v2")
-_OUTPUT_FORMAT = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_44100_128")
-_VOICE_ID_CARTOON_DAD = os.getenv("VOICE_ID_CARTOON_DAD")
-_VOICE_ID_JOHN = os.getenv("VOICE_ID_JOHN")
+from backend.tracing import span
+from backend.tts_engines import get_engine
 
+load_dotenv()
 
-_client = ElevenLabs(api_key=_API_KEY)
+_engine = get_engine()
 _logger = logging.getLogger(__name__)
 
 
 
 def voice_id_for(speaker: str) -> str:
-    """Return the configured ElevenLabs voice ID for a Duo Mode speaker."""
-    speaker_key = speaker.strip().upper()
-    if speaker_key == "JOHN":
-        voice_id = _VOICE_ID_JOHN
-    elif speaker_key == "CARTOON_DAD":
-        voice_id = _VOICE_ID_CARTOON_DAD
-    else:
-        voice_id = None
-
-    if not voice_id:
-        voice_id = _DEFAULT_VOICE_ID
-    if not voice_id:
-        raise RuntimeError(
-            "Missing ElevenLabs voice mapping. "
-            "Set VOICE_ID_JOHN and VOICE_ID_CARTOON_DAD (or ELEVENLABS_VOICE_ID as fallback)."
-        )
-    return voice_id
+    """Return the active engine's voice ID for a Duo Mode speaker."""
+    return _engine.voice_id_for(speaker)
 
 
 def speak_text(text: str, voice_id: Optional[str] = None, logger: Optional[logging.Logger] = None) -> bytes:
-    """Generate speech audio using ElevenLabs voices and return mp3 bytes."""
+    """Generate speech audio with the active engine and return mp3 bytes."""
     active_logger = logger or _logger
     resolved_voice_id = voice_id or voice_id_for("JOHN")
     active_logger.info(
-        "Synthesizing speech (voice=%s, chars=%s)",
+        "Synthesizing speech (engine=%s, voice=%s, chars=%s)",
+        _engine.name,
         resolved_voice_id,
         len(text),
     )
-    try:
-        audio_chunks = _client.text_to_speech.convert(
-            voice_id=resolved_voice_id,
-            model_id=_MODEL_ID,
-            text=text,
-            output_format=_OUTPUT_FORMAT,
-            optimize_streaming_latency="0",
-        )
-    except Exception as exc:  # pragma: no cover - depends on external API
-        active_logger.error("ElevenLabs text-to-speech failed: %s", exc)
-        raise RuntimeError(f"ElevenLabs text-to-speech failed: {exc}") from exc
+    with span("tts.speak", engine=_engine.name, bytes_in=len(text)) as s:
+        audio = _engine.speak(text, resolved_voice_id, active_logger)
+        s.set(bytes_out=len(audio))
+    return audio
 
-    return b"".join(audio_chunks)
+
+def speak_lines(
+    lines: Sequence[tuple[str, str]],
+    logger: Optional[logging.Logger] = None,
+) -> Iterator[bytes]:
+    """Yield mp3 bytes for each ``(text, voice_id)`` in order, batched through the engine."""
+    active_logger = logger or _logger
+    active_logger.info("Synthesizing %s lines (engine=%s)", len(lines), _engine.name)
+    # speak_many lets batch-capable engines fan lines out across workers, so
+    # each tts.speak span here measures the wait for that line's audio.
+    chunks = iter(_engine.speak_many(lines, active_logger))
+    for text, _voice_id in lines:
+        with span("tts.speak", engine=_engine.name, bytes_in=len(text)) as s:
+            chunk = next(chunks)
+            s.set(bytes_out=len(chunk))
+        yield chunk
 
 
 def stitch_mp3_chunks(
@@ -84,20 +74,22 @@ def stitch_mp3_chunks(
     if not chunks:
         raise ValueError("No audio chunks were provided for stitching.")
 
-    combined: AudioSegment | None = None
-    pause = AudioSegment.silent(duration=max(pause_ms, 0))
-
-    for chunk in chunks:
-        segment = AudioSegment.from_file(BytesIO(chunk), format="mp3")
-        if combined is None:
-            combined = segment
-        else:
-            combined += pause + segment
-
-    assert combined is not None  # for mypy-like tools
-    active_logger.info("Stitching %s audio chunks with %sms pauses", len(chunks), pause_ms)
-    buffer = BytesIO()
-    combined.export(buffer, format="mp3")
+    with span("tts.stitch", chunks=len(chunks), bytes_in=sum(len(chunk) for chunk in chunks)) as s:
+        combined: AudioSegment | None = None
+        pause = AudioSegment.silent(duration=max(pause_ms, 0))
+
+        for chunk in chunks:
+            segment = AudioSegment.from_file(BytesIO(chunk), format="mp3")
+            if combined is None:
+                combined = segment
+            else:
+                combined += pause + segment
+
+        assert combined is not None  # for mypy-like tools
+        active_logger.info("Stitching %s audio chunks with %sms pauses", len(chunks), pause_ms)
+        buffer = BytesIO()
+        combined.export(buffer, format="mp3")
+        s.set(bytes_out=buffer.tell())
     return buffer.getvalue()
 
 
@@ -107,3 +99,114 @@ def mp3_duration_seconds(mp3_bytes: bytes) -> float:
         raise ValueError("mp3_bytes must be non-empty.")
     segment = AudioSegment.from_file(BytesIO(mp3_bytes), format="mp3")
     return float(segment.duration_seconds)
+
+
+def synthesize_dialogue(
+    dialogue: Sequence[dict[str, str]],
+    pause_ms: int = 250,
+    logger: Optional[logging.Logger] = None,
+    on_line: Optional[Callable[[int, int], None]] = None,
+) -> tuple[bytes, list[dict[str, object]]]:
+    """Speak each dialogue turn and return stitched mp3 plus per-line timing."""
+    active_logger = logger or _logger
+    audio_chunks: list[bytes] = []
+    timed_dialogue: list[dict[str, object]] = []
+    current_start = 0.0
+    pause_seconds = max(pause_ms, 0) / 1000.0
+    lines = [(turn["line"], voice_id_for(turn["speaker"])) for turn in dialogue]
+    chunks = speak_lines(lines, logger=active_logger)
+    for idx, (turn, chunk) in enumerate(zip(dialogue, chunks), start=1):
+        duration = mp3_duration_seconds(chunk)
+        audio_chunks.append(chunk)
+        timed_dialogue.append(
+            {
+                "speaker": turn["speaker"],
+                "text": turn["line"],
+                "start": current_start,
+                "duration": duration,
+            }
+        )
+        current_start += duration + pause_seconds
+        if on_line is not None:
+            on_line(idx, len(dialogue))
+
+    final_audio = stitch_mp3_chunks(audio_chunks, pause_ms=pause_ms, logger=active_logger)
+    return final_audio, timed_dialogue
+
+
+async def speak_text_async(
+    text: str,
+    voice_id: Optional[str] = None,
+    logger: Optional[logging.Logger] = None,
+) -> bytes:
+    """Async counterpart of ``speak_text``."""
+    active_logger = logger or _logger
+    resolved_voice_id = voice_id or voice_id_for("JOHN")
+    active_logger.info(
+        "Synthesizing speech (engine=%s, voice=%s, chars=%s)",
+        _engine.name,
+        resolved_voice_id,
+        len(text),
+    )
+    with span("tts.speak", engine=_engine.name, bytes_in=len(text)) as s:
+        audio = await _engine.speak_async(text, resolved_voice_id, active_logger)
+        s.set(bytes_out=len(audio))
+    return audio
+
+
+async def stitch_mp3_chunks_async(
+    chunks: Sequence[bytes],
+    pause_ms: int = 250,
+    logger: Optional[logging.Logger] = None,
+) -> bytes:
+    """Run ``stitch_mp3_chunks`` (pydub/ffmpeg) in the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, stitch_mp3_chunks, chunks, pause_ms, logger)
+
+
+async def mp3_duration_seconds_async(mp3_bytes: bytes) -> float:
+    """Run ``mp3_duration_seconds`` in the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, mp3_duration_seconds, mp3_bytes)
+
+
+async def synthesize_dialogue_async(
+    dialogue: Sequence[dict[str, str]],
+    pause_ms: int = 250,
+    logger: Optional[logging.Logger] = None,
+    timings: Optional[dict[str, float]] = None,
+) -> tuple[bytes, list[dict[str, object]]]:
+    """Async ``synthesize_dialogue``; all lines are requested concurrently.
+
+    When given, ``timings`` receives the seconds spent on ``"tts"`` (speech
+    and durations) and ``"stitch"``.
+    """
+    started = time.perf_counter()
+    chunks = await asyncio.gather(
+        *(
+            speak_text_async(turn["line"], voice_id=voice_id_for(turn["speaker"]), logger=logger)
+            for turn in dialogue
+        )
+    )
+    durations = await asyncio.gather(*(mp3_duration_seconds_async(chunk) for chunk in chunks))
+
+    timed_dialogue: list[dict[str, object]] = []
+    current_start = 0.0
+    pause_seconds = max(pause_ms, 0) / 1000.0
+    for turn, duration in zip(dialogue, durations):
+        timed_dialogue.append(
+            {
+                "speaker": turn["speaker"],
+                "text": turn["line"],
+                "start": current_start,
+                "duration": duration,
+            }
+        )
+        current_start += duration + pause_seconds
+
+    stitch_started = time.perf_counter()
+    final_audio = await stitch_mp3_chunks_async(list(chunks), pause_ms=pause_ms, logger=logger)
+    if timings is not None:
+        timings["tts"] = stitch_started - started
+        timings["stitch"] = time.perf_counter() - stitch_started
+    return final_audio, timed_dialogue